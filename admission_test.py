@@ -0,0 +1,156 @@
+import asyncio
+import os
+import sys
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+from services import admission  # noqa: E402
+from services.admission import (  # noqa: E402
+    AdmissionRejected,
+    ROUTE_RATES,
+    acquire_slot,
+    admit,
+    release,
+    release_slot,
+    take_token,
+)
+
+class AdmissionTester:
+    def __init__(self, mongo_url=None):
+        self.mongo_url = mongo_url or os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
+        # A throwaway database, dropped when the run ends
+        self.db_name = f"admission_test_{uuid.uuid4().hex[:8]}"
+        self.client = None
+        self.db = None
+        self.tests_run = 0
+        self.tests_passed = 0
+        self.test_results = []
+
+    def log_test(self, name, success, details=""):
+        """Log test result"""
+        self.tests_run += 1
+        if success:
+            self.tests_passed += 1
+
+        result = {
+            "test": name,
+            "success": success,
+            "details": details,
+            "timestamp": datetime.now().isoformat()
+        }
+        self.test_results.append(result)
+
+        status = "✅ PASS" if success else "❌ FAIL"
+        print(f"{status} - {name}")
+        if details:
+            print(f"    Details: {details}")
+
+    async def test_slots_fill_up(self):
+        """Slots are granted up to the limit; the next upsert collides and reports full"""
+        key = "user:fill"
+        granted = [await acquire_slot(self.db, key, 2, f"lease-{i}") for i in range(3)]
+        doc = await self.db.admission_slots.find_one({"_id": key})
+        leases = len(doc['leases']) if doc else 0
+        self.log_test("Slots fill up to the limit", granted == [True, True, False] and leases == 2,
+                      f"granted={granted}, leases={leases}")
+
+    async def test_release_frees_slot(self):
+        """Releasing a lease lets the next request in"""
+        key = "user:release"
+        await acquire_slot(self.db, key, 1, "first")
+        blocked = await acquire_slot(self.db, key, 1, "second")
+        await release_slot(self.db, key, "first")
+        granted = await acquire_slot(self.db, key, 1, "second")
+        self.log_test("Release frees a slot", not blocked and granted,
+                      f"blocked={not blocked}, granted_after_release={granted}")
+
+    async def test_expired_lease_is_reclaimed(self):
+        """A lease left by a crashed worker stops counting once it expires"""
+        key = "user:expired"
+        expired = datetime.now(timezone.utc) - timedelta(seconds=1)
+        await self.db.admission_slots.insert_one({"_id": key, "leases": [{"id": "crashed", "expires_at": expired}]})
+        granted = await acquire_slot(self.db, key, 1, "fresh")
+        doc = await self.db.admission_slots.find_one({"_id": key})
+        ids = [lease['id'] for lease in doc['leases']]
+        self.log_test("Expired lease is reclaimed", granted and ids == ["fresh"], f"granted={granted}, leases={ids}")
+
+    async def test_token_bucket_burst(self):
+        """A bucket allows its capacity in a burst, then reports when to retry"""
+        route = "questions_generate"
+        rate, capacity = ROUTE_RATES[route]
+        waits = [await take_token(self.db, "bucket-user", route) for _ in range(capacity + 1)]
+        allowed = all(wait == 0 for wait in waits[:capacity])
+        retry = waits[-1]
+        self.log_test("Token bucket burst then Retry-After", allowed and 0 < retry <= 1 / rate,
+                      f"waits={[round(w, 2) for w in waits]}, max_wait={1 / rate:.1f}s")
+
+    async def test_admit_sheds_over_user_concurrency(self):
+        """Requests beyond the per-user cap wait, then are shed"""
+        user_id = "busy-user"
+        route = "assignments_generate"
+        leases = [await admit(self.db, user_id, route) for _ in range(admission.USER_CONCURRENCY)]
+        try:
+            await admit(self.db, user_id, route)
+            shed = False
+            reason = "admitted"
+        except AdmissionRejected as e:
+            shed = True
+            reason = e.reason
+        for lease_id in leases:
+            await release(self.db, user_id, lease_id)
+        doc = await self.db.admission_slots.find_one({"_id": f"user:{user_id}"})
+        self.log_test("Admission sheds over user concurrency", shed and not doc['leases'],
+                      f"reason={reason}, leases_left={len(doc['leases'])}")
+
+    async def run_all_tests(self):
+        """Run admission control tests against a real MongoDB"""
+        print("🚀 Starting Admission Control Tests")
+        print("=" * 50)
+
+        self.client = AsyncIOMotorClient(self.mongo_url, serverSelectionTimeoutMS=5000)
+        self.db = self.client[self.db_name]
+        # Keep the shedding test quick
+        admission.QUEUE_TIMEOUT = 0.5
+        try:
+            await self.test_slots_fill_up()
+            await self.test_release_frees_slot()
+            await self.test_expired_lease_is_reclaimed()
+            await self.test_token_bucket_burst()
+            await self.test_admit_sheds_over_user_concurrency()
+        except Exception as e:
+            self.log_test("Admission tests ran", False, f"{type(e).__name__}: {e}")
+        finally:
+            try:
+                await self.client.drop_database(self.db_name)
+            except Exception:
+                pass
+            self.client.close()
+
+        return self.get_summary()
+
+    def get_summary(self):
+        """Get test summary"""
+        print("\n" + "=" * 50)
+        print(f"📊 Test Summary: {self.tests_passed}/{self.tests_run} tests passed")
+
+        if self.tests_passed == self.tests_run:
+            print("🎉 All tests passed!")
+            return 0
+        else:
+            print("⚠️  Some tests failed")
+            failed_tests = [r for r in self.test_results if not r['success']]
+            print("\nFailed Tests:")
+            for test in failed_tests:
+                print(f"  - {test['test']}: {test['details']}")
+            return 1
+
+def main():
+    tester = AdmissionTester()
+    return asyncio.run(tester.run_all_tests())
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,4 +1,4 @@
-from fastapi import FastAPI, APIRouter, UploadFile, File, HTTPException, Depends, Form
+from fastapi import FastAPI, APIRouter, UploadFile, File, HTTPException, Depends, Form, Query, Request, Header
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
@@ -13,11 +13,25 @@ from datetime import datetime, timezone, timedelta
 import jwt
 from passlib.context import CryptContext
 import io
+import hashlib
+import asyncio
 from fastapi.responses import StreamingResponse
 
-from services.text_extraction import extract_text_from_file
-from services.question_generator import generate_questions_with_answers
-from services.pdf_generator import generate_assignment_pdf
+# Services load their parser, LLM and PDF libraries on first use
+from services.text_extraction import extract_text_from_file, preload_extractors
+from services.question_generator import generate_questions_with_answers, preload_llm_client
+from services.pdf_generator import generate_assignment_pdf, preload_pdf_renderer
+from services.dedup_index import NearDuplicateIndex, encode_signature
+from services.question_pool import (
+    content_hash,
+    claim_from_pool,
+    return_to_pool,
+    prefill_pools,
+    record_pool_demand,
+    ensure_pool_indexes,
+)
+from services.admission import admit, release, retry_after_header, AdmissionRejected
+from services.ingestion import start_extraction, retry_extraction, resume_extractions
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -36,6 +50,19 @@ JWT_SECRET = os.environ.get('JWT_SECRET', 'eduqg_secret_key')
 JWT_ALGORITHM = "HS256"
 JWT_EXPIRATION = 24
 
+UPLOAD_DIR = Path("/app/uploads")
+ALLOWED_FILE_TYPES = ['pdf', 'docx', 'txt', 'epub']
+# A chunk writer that stops (crash, dropped connection) frees its range after this
+CHUNK_WRITE_LEASE = timedelta(minutes=5)
+# Sessions still uploading after this long are deleted along with their file
+UPLOAD_SESSION_TTL = timedelta(hours=24)
+UPLOAD_SWEEP_INTERVAL = 3600
+MAX_CHUNK_SIZE = 8 * 1024 * 1024
+
+# Comma-separated features to import at startup instead of on first use:
+# pdf, docx, epub, llm, assignments (or "all")
+WARMUP_FEATURES = [f.strip() for f in os.environ.get('WARMUP_FEATURES', '').split(',') if f.strip()]
+
 class UserRegister(BaseModel):
     email: EmailStr
     password: str
@@ -65,6 +92,12 @@ class EBook(BaseModel):
     file_path: str
     extracted_text: str
     word_count: int
+    content_hash: Optional[str] = None
+    extraction_status: str = "complete"
+    extraction_error: Optional[str] = None
+    # Progress cursor: sections done, or bytes read for TXT files
+    sections_done: int = 0
+    sections_total: Optional[int] = None
     uploaded_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
 class EBookSummary(BaseModel):
@@ -75,8 +108,30 @@ class EBookSummary(BaseModel):
     file_type: str
     file_path: str
     word_count: int
+    extraction_status: str = "complete"
+    extraction_error: Optional[str] = None
+    # Progress cursor: sections done, or bytes read for TXT files
+    sections_done: int = 0
+    sections_total: Optional[int] = None
     uploaded_at: datetime
 
+class UploadSessionCreate(BaseModel):
+    filename: str
+    total_size: int = Field(gt=0)
+
+class UploadSession(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    user_id: str
+    filename: str
+    file_type: str
+    file_path: str
+    total_size: int
+    received: int = 0
+    status: str = "uploading"
+    ebook_id: Optional[str] = None
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
 class QuestionGenerationRequest(BaseModel):
     ebook_id: str
     question_types: List[str]
@@ -94,6 +149,16 @@ class GeneratedQuestion(BaseModel):
     answer: str
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
+class SearchResults(BaseModel):
+    query: str
+    page: int
+    ebook_page: int
+    page_size: int
+    total_questions: int
+    total_ebooks: int
+    questions: List[GeneratedQuestion]
+    ebooks: List[EBookSummary]
+
 class AssignmentGenerateRequest(BaseModel):
     question_ids: List[str]
     student_name: str
@@ -118,6 +183,26 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
     except jwt.InvalidTokenError:
         raise HTTPException(status_code=401, detail="Invalid token")
 
+def admission_control(route: str):
+    """
+    Dependency that rate limits and caps concurrency of an expensive route,
+    shedding with 429 and Retry-After when limits are hit
+    """
+    async def dependency(current_user: User = Depends(get_current_user)):
+        try:
+            lease_id = await admit(db, current_user.id, route)
+        except AdmissionRejected as e:
+            raise HTTPException(
+                status_code=429,
+                detail=e.reason,
+                headers={"Retry-After": retry_after_header(e.retry_after)}
+            )
+        try:
+            yield
+        finally:
+            await release(db, current_user.id, lease_id)
+    return dependency
+
 @api_router.post("/auth/register")
 async def register(user_data: UserRegister):
     existing = await db.users.find_one({"email": user_data.email}, {"_id": 0})
@@ -162,12 +247,15 @@ async def login(credentials: UserLogin):
     return {"token": token, "user": User(**user_doc)}
 
 @api_router.post("/ebooks/upload")
-async def upload_ebook(file: UploadFile = File(...), current_user: User = Depends(get_current_user)):
-    allowed_types = ['pdf', 'docx', 'txt', 'epub']
+async def upload_ebook(
+    file: UploadFile = File(...),
+    current_user: User = Depends(get_current_user),
+    _admitted: None = Depends(admission_control("ebooks_upload"))
+):
     file_ext = file.filename.split('.')[-1].lower()
     
-    if file_ext not in allowed_types:
-        raise HTTPException(status_code=400, detail=f"File type not supported. Allowed: {allowed_types}")
+    if file_ext not in ALLOWED_FILE_TYPES:
+        raise HTTPException(status_code=400, detail=f"File type not supported. Allowed: {ALLOWED_FILE_TYPES}")
     
     file_content = await file.read()
     
@@ -178,9 +266,8 @@ async def upload_ebook(file: UploadFile = File(...), current_user: User = Depend
     
     word_count = len(extracted_text.split())
     
-    upload_dir = Path("/app/uploads")
-    upload_dir.mkdir(exist_ok=True)
-    file_path = upload_dir / f"{uuid.uuid4()}_{file.filename}"
+    UPLOAD_DIR.mkdir(exist_ok=True)
+    file_path = UPLOAD_DIR / f"{uuid.uuid4()}_{file.filename}"
     
     with open(file_path, "wb") as f:
         f.write(file_content)
@@ -193,14 +280,184 @@ async def upload_ebook(file: UploadFile = File(...), current_user: User = Depend
         extracted_text=extracted_text[:50000],
         word_count=word_count
     )
+    ebook.content_hash = content_hash(ebook.extracted_text)
+    
+    doc = ebook.model_dump()
+    doc['uploaded_at'] = doc['uploaded_at'].isoformat()
+    
+    await db.ebooks.insert_one(doc)
+    
+    prefill_pools(db, ebook.content_hash, ebook.extracted_text)
+    
+    return ebook
+
+def write_chunk(file_path: str, offset: int, data: bytes):
+    with open(file_path, "r+b" if offset else "wb") as f:
+        f.seek(offset)
+        f.write(data)
+
+@api_router.post("/ebooks/uploads", response_model=UploadSession)
+async def create_upload_session(session_data: UploadSessionCreate, current_user: User = Depends(get_current_user)):
+    # Directory parts of a client filename must not leak into the path
+    filename = Path(session_data.filename).name
+    file_ext = filename.split('.')[-1].lower()
+    
+    if file_ext not in ALLOWED_FILE_TYPES:
+        raise HTTPException(status_code=400, detail=f"File type not supported. Allowed: {ALLOWED_FILE_TYPES}")
+    
+    UPLOAD_DIR.mkdir(exist_ok=True)
+    session_id = str(uuid.uuid4())
+    session = UploadSession(
+        id=session_id,
+        user_id=current_user.id,
+        filename=filename,
+        file_type=file_ext,
+        file_path=str(UPLOAD_DIR / f"{session_id}_{filename}"),
+        total_size=session_data.total_size
+    )
+    
+    doc = session.model_dump()
+    doc['created_at'] = doc['created_at'].isoformat()
+    
+    await db.upload_sessions.insert_one(doc)
+    
+    return session
+
+async def get_upload_session_doc(upload_id: str, user_id: str) -> dict:
+    session = await db.upload_sessions.find_one({"id": upload_id, "user_id": user_id}, {"_id": 0})
+    if not session:
+        raise HTTPException(status_code=404, detail="Upload session not found")
+    if isinstance(session['created_at'], str):
+        session['created_at'] = datetime.fromisoformat(session['created_at'])
+    return session
+
+@api_router.get("/ebooks/uploads/{upload_id}", response_model=UploadSession)
+async def get_upload_session(upload_id: str, current_user: User = Depends(get_current_user)):
+    return await get_upload_session_doc(upload_id, current_user.id)
+
+@api_router.put("/ebooks/uploads/{upload_id}/chunks", response_model=UploadSession)
+async def upload_chunk(
+    upload_id: str,
+    request: Request,
+    offset: int = Query(..., ge=0),
+    x_chunk_checksum: str = Header(...),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Append a chunk at `offset`. The client resumes from the session's
+    `received` offset; chunks already stored are acknowledged idempotently.
+    """
+    session = await get_upload_session_doc(upload_id, current_user.id)
+    if session['status'] != "uploading":
+        raise HTTPException(status_code=409, detail="Upload already completed")
+    
+    data = await request.body()
+    if not data or len(data) > MAX_CHUNK_SIZE:
+        raise HTTPException(status_code=400, detail=f"Chunk must be 1 to {MAX_CHUNK_SIZE} bytes")
+    if hashlib.sha256(data).hexdigest() != x_chunk_checksum.lower():
+        raise HTTPException(status_code=400, detail="Chunk checksum mismatch")
+    if offset + len(data) <= session['received']:
+        return session
+    if offset != session['received']:
+        raise HTTPException(status_code=409, detail=f"Expected offset {session['received']}")
+    if offset + len(data) > session['total_size']:
+        raise HTTPException(status_code=400, detail="Chunk exceeds declared file size")
+    
+    # Claim the byte range before touching the file, so of two concurrent
+    # writers at the same offset only the one recorded in Mongo writes
+    writer = str(uuid.uuid4())
+    now = datetime.now(timezone.utc)
+    claimed = await db.upload_sessions.update_one(
+        {
+            "id": upload_id,
+            "status": "uploading",
+            "received": offset,
+            "$or": [{"chunk_lease_until": None}, {"chunk_lease_until": {"$lt": now}}]
+        },
+        {"$set": {"chunk_writer": writer, "chunk_lease_until": now + CHUNK_WRITE_LEASE}}
+    )
+    if claimed.matched_count == 0:
+        raise HTTPException(status_code=409, detail="Concurrent chunk upload")
+    
+    try:
+        await asyncio.to_thread(write_chunk, session['file_path'], offset, data)
+        result = await db.upload_sessions.update_one(
+            {"id": upload_id, "chunk_writer": writer},
+            {
+                "$set": {"received": offset + len(data)},
+                "$unset": {"chunk_writer": "", "chunk_lease_until": ""}
+            }
+        )
+    except Exception:
+        await db.upload_sessions.update_one(
+            {"id": upload_id, "chunk_writer": writer},
+            {"$unset": {"chunk_writer": "", "chunk_lease_until": ""}}
+        )
+        raise
+    if result.matched_count == 0:
+        raise HTTPException(status_code=409, detail="Chunk write lease expired")
+    
+    session['received'] = offset + len(data)
+    return session
+
+@api_router.post("/ebooks/uploads/{upload_id}/complete", response_model=EBookSummary)
+async def complete_upload(
+    upload_id: str,
+    current_user: User = Depends(get_current_user),
+    _admitted: None = Depends(admission_control("ebooks_upload"))
+):
+    """
+    Register the e-book and extract its text in the background, section by
+    section. Text is usable for generation as soon as the first sections land.
+    """
+    session = await get_upload_session_doc(upload_id, current_user.id)
+    if session['received'] != session['total_size']:
+        raise HTTPException(status_code=409, detail=f"Upload incomplete: {session['received']}/{session['total_size']} bytes")
+    
+    ebook = EBook(
+        user_id=current_user.id,
+        title=session['filename'],
+        file_type=session['file_type'],
+        file_path=session['file_path'],
+        extracted_text="",
+        word_count=0,
+        extraction_status="processing"
+    )
+    claimed = await db.upload_sessions.find_one_and_update(
+        {"id": upload_id, "status": "uploading"},
+        {"$set": {"status": "complete", "ebook_id": ebook.id}}
+    )
+    if not claimed:
+        raise HTTPException(status_code=409, detail="Upload already completed")
     
     doc = ebook.model_dump()
     doc['uploaded_at'] = doc['uploaded_at'].isoformat()
     
     await db.ebooks.insert_one(doc)
+    await start_extraction(db, ebook.id)
     
     return ebook
 
+@api_router.post("/ebooks/{ebook_id}/extraction/retry", response_model=EBookSummary)
+async def retry_ebook_extraction(
+    ebook_id: str,
+    current_user: User = Depends(get_current_user),
+    _admitted: None = Depends(admission_control("ebooks_upload"))
+):
+    """
+    Restart a failed extraction from the last section it stored
+    """
+    if not await retry_extraction(db, ebook_id, current_user.id):
+        ebook = await db.ebooks.find_one({"id": ebook_id, "user_id": current_user.id}, {"_id": 0, "id": 1})
+        if not ebook:
+            raise HTTPException(status_code=404, detail="E-book not found")
+        raise HTTPException(status_code=409, detail="E-book extraction has not failed")
+    
+    ebook = await db.ebooks.find_one({"id": ebook_id}, {"_id": 0, "extracted_text": 0})
+    if isinstance(ebook['uploaded_at'], str):
+        ebook['uploaded_at'] = datetime.fromisoformat(ebook['uploaded_at'])
+    return ebook
+
 @api_router.get("/ebooks", response_model=List[EBookSummary])
 async def get_ebooks(current_user: User = Depends(get_current_user)):
     ebooks = await db.ebooks.find({"user_id": current_user.id}, {"_id": 0, "extracted_text": 0}).to_list(100)
@@ -211,25 +468,118 @@ async def get_ebooks(current_user: User = Depends(get_current_user)):
     
     return ebooks
 
+async def load_question_index(ebook_id: str, user_id: str) -> NearDuplicateIndex:
+    doc = await db.question_indexes.find_one({"ebook_id": ebook_id, "user_id": user_id}, {"_id": 0})
+    if doc:
+        index = NearDuplicateIndex.from_document(doc)
+        if index is not None:
+            return index
+    return await rebuild_question_index(ebook_id, user_id)
+
+async def rebuild_question_index(ebook_id: str, user_id: str) -> NearDuplicateIndex:
+    questions = await db.questions.find(
+        {"ebook_id": ebook_id, "user_id": user_id},
+        {"_id": 0, "id": 1, "question": 1}
+    ).to_list(None)
+    index = NearDuplicateIndex.from_questions(questions)
+    
+    await db.question_indexes.update_one(
+        {"ebook_id": ebook_id, "user_id": user_id},
+        {"$set": index.to_document()},
+        upsert=True
+    )
+    return index
+
 @api_router.post("/questions/generate")
-async def generate_questions(request: QuestionGenerationRequest, current_user: User = Depends(get_current_user)):
+async def generate_questions(
+    request: QuestionGenerationRequest,
+    current_user: User = Depends(get_current_user),
+    _admitted: None = Depends(admission_control("questions_generate"))
+):
     ebook = await db.ebooks.find_one({"id": request.ebook_id, "user_id": current_user.id}, {"_id": 0})
     if not ebook:
         raise HTTPException(status_code=404, detail="E-book not found")
     
-    try:
-        questions_data = await generate_questions_with_answers(
-            ebook['extracted_text'],
+    extraction_status = ebook.get('extraction_status', 'complete')
+    extraction_complete = extraction_status == 'complete'
+    if not ebook['extracted_text']:
+        if extraction_status == 'failed':
+            raise HTTPException(
+                status_code=422,
+                detail=f"Text extraction failed: {ebook.get('extraction_error', 'unknown error')}. "
+                       f"Retry it with POST /api/ebooks/{request.ebook_id}/extraction/retry"
+            )
+        raise HTTPException(status_code=409, detail="E-book text is still being extracted")
+    
+    index = await load_question_index(request.ebook_id, current_user.id)
+    accepted_ids = {}
+    
+    def is_duplicate(text: str) -> bool:
+        signature = index.signature(text)
+        if index.find_duplicate(signature) is not None:
+            return True
+        # Index accepted questions immediately so near-duplicates within
+        # the same generation are rejected too
+        question_id = str(uuid.uuid4())
+        index.insert(question_id, signature)
+        accepted_ids[text] = question_id
+        return False
+    
+    # Serve from the pre-generated pool first; the LLM only fills the rest.
+    # Pools are keyed by the full text, so partially extracted books skip them.
+    text_hash = None
+    pooled = []
+    if extraction_complete:
+        text_hash = ebook.get('content_hash') or content_hash(ebook['extracted_text'])
+        pooled = await claim_from_pool(
+            db,
+            text_hash,
             request.question_types,
             request.difficulty,
             request.num_questions
         )
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to generate questions: {str(e)}")
+    questions_data = []
+    duplicates = []
+    for q in pooled:
+        (duplicates if is_duplicate(q['question']) else questions_data).append(q)
+    # Near-duplicates for this user may still be new to others
+    await return_to_pool(db, text_hash, request.difficulty, duplicates)
+    
+    remaining = request.num_questions - len(questions_data)
+    if remaining > 0:
+        try:
+            questions_data += await generate_questions_with_answers(
+                ebook['extracted_text'],
+                request.question_types,
+                request.difficulty,
+                remaining,
+                is_duplicate=is_duplicate
+            )
+        except Exception as e:
+            if not questions_data:
+                raise HTTPException(status_code=500, detail=f"Failed to generate questions: {str(e)}")
+            logger.warning(f"Returning {len(questions_data)} pooled questions; generation failed: {e}")
+    
+    if not questions_data:
+        raise HTTPException(
+            status_code=409,
+            detail="No new questions could be generated: every candidate duplicated an existing question for this e-book"
+        )
+    
+    if text_hash:
+        await record_pool_demand(
+            db,
+            text_hash,
+            ebook['extracted_text'],
+            request.question_types,
+            request.difficulty
+        )
     
     saved_questions = []
+    new_signatures = {}
     for q_data in questions_data:
         question = GeneratedQuestion(
+            id=accepted_ids.get(q_data['question'], str(uuid.uuid4())),
             user_id=current_user.id,
             ebook_id=request.ebook_id,
             question_type=q_data['type'],
@@ -241,6 +591,15 @@ async def generate_questions(request: QuestionGenerationRequest, current_user: U
         doc['created_at'] = doc['created_at'].isoformat()
         await db.questions.insert_one(doc)
         saved_questions.append(question)
+        if question.id in index.signatures:
+            new_signatures[f"signatures.{question.id}"] = encode_signature(index.signatures[question.id])
+    
+    if new_signatures:
+        await db.question_indexes.update_one(
+            {"ebook_id": request.ebook_id, "user_id": current_user.id},
+            {"$set": new_signatures},
+            upsert=True
+        )
     
     return saved_questions
 
@@ -258,8 +617,71 @@ async def get_questions(ebook_id: Optional[str] = None, current_user: User = Dep
     
     return questions
 
+@api_router.get("/search", response_model=SearchResults)
+async def search(
+    q: str = Query(..., min_length=1),
+    question_type: Optional[str] = None,
+    difficulty: Optional[str] = None,
+    ebook_id: Optional[str] = None,
+    page: int = Query(1, ge=1),
+    ebook_page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=100),
+    current_user: User = Depends(get_current_user)
+):
+    text_query = {"$text": {"$search": q}, "user_id": current_user.id}
+    score = {"score": {"$meta": "textScore"}}
+    # Questions and e-books are paginated independently (page / ebook_page)
+    skip = (page - 1) * page_size
+    ebook_skip = (ebook_page - 1) * page_size
+    
+    question_query = dict(text_query)
+    if question_type:
+        question_query["question_type"] = question_type
+    if difficulty:
+        question_query["difficulty"] = difficulty
+    if ebook_id:
+        question_query["ebook_id"] = ebook_id
+    
+    questions = await db.questions.find(question_query, {"_id": 0, **score}).sort(
+        [("score", {"$meta": "textScore"})]
+    ).skip(skip).limit(page_size).to_list(page_size)
+    total_questions = await db.questions.count_documents(question_query)
+    
+    for question in questions:
+        if isinstance(question['created_at'], str):
+            question['created_at'] = datetime.fromisoformat(question['created_at'])
+    
+    # Question filters don't apply to e-books; only ebook_id narrows them
+    ebook_query = dict(text_query)
+    if ebook_id:
+        ebook_query["id"] = ebook_id
+    
+    ebooks = await db.ebooks.find(ebook_query, {"_id": 0, "extracted_text": 0, **score}).sort(
+        [("score", {"$meta": "textScore"})]
+    ).skip(ebook_skip).limit(page_size).to_list(page_size)
+    total_ebooks = await db.ebooks.count_documents(ebook_query)
+    
+    for ebook in ebooks:
+        if isinstance(ebook['uploaded_at'], str):
+            ebook['uploaded_at'] = datetime.fromisoformat(ebook['uploaded_at'])
+    
+    return SearchResults(
+        query=q,
+        page=page,
+        ebook_page=ebook_page,
+        page_size=page_size,
+        total_questions=total_questions,
+        total_ebooks=total_ebooks,
+        questions=questions,
+        ebooks=ebooks
+    )
+
 @api_router.post("/assignments/generate")
-async def generate_assignment(request: AssignmentGenerateRequest, current_user: User = Depends(get_current_user)):
+async def generate_assignment(
+    request: AssignmentGenerateRequest,
+    current_user: User = Depends(get_current_user),
+    _admitted: None = Depends(admission_control("assignments_generate"))
+):
     questions = []
     for qid in request.question_ids:
         q = await db.questions.find_one({"id": qid, "user_id": current_user.id}, {"_id": 0})
@@ -270,7 +692,9 @@ async def generate_assignment(request: AssignmentGenerateRequest, current_user:
         raise HTTPException(status_code=404, detail="No questions found")
     
     try:
-        pdf_bytes = generate_assignment_pdf(
+        # Rendered off the event loop so other requests keep being served
+        pdf_bytes = await asyncio.to_thread(
+            generate_assignment_pdf,
             questions,
             request.student_name,
             request.roll_number,
@@ -307,6 +731,109 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+def warm_up(features: List[str]):
+    if 'all' in features:
+        features = ['pdf', 'docx', 'epub', 'llm', 'assignments']
+    preload_extractors([f for f in features if f in ('pdf', 'docx', 'epub')])
+    if 'llm' in features:
+        preload_llm_client()
+    if 'assignments' in features:
+        preload_pdf_renderer()
+
+async def replace_text_index(collection, keys, weights: dict, name: str):
+    # A collection may only have one text index, so drop any other first
+    indexes = await collection.index_information()
+    for index_name, info in indexes.items():
+        if index_name != name and any(kind == "text" for _, kind in info['key']):
+            await collection.drop_index(index_name)
+    await collection.create_index(keys, weights=weights, name=name)
+
+async def ensure_question_index_key():
+    # One near-duplicate index document per (e-book, user), so lookups use
+    # an index and concurrent first upserts cannot create two documents
+    if "ebook_id_1_user_id_1" in await db.question_indexes.index_information():
+        return
+    # Documents duplicated before the key existed are derived data: drop
+    # them and let load_question_index rebuild from the stored questions
+    duplicates = db.question_indexes.aggregate([
+        {"$group": {"_id": {"ebook_id": "$ebook_id", "user_id": "$user_id"}, "count": {"$sum": 1}}},
+        {"$match": {"count": {"$gt": 1}}}
+    ])
+    async for group in duplicates:
+        await db.question_indexes.delete_many(group['_id'])
+    await db.question_indexes.create_index([("ebook_id", 1), ("user_id", 1)], unique=True)
+
+@app.on_event("startup")
+async def create_indexes():
+    await ensure_pool_indexes(db)
+    await db.ebooks.create_index([("extraction_status", 1), ("extraction_lease_until", 1)])
+    await db.upload_sessions.create_index("id", unique=True)
+    await db.upload_sessions.create_index([("status", 1), ("created_at", 1)])
+    await ensure_question_index_key()
+    # Text indexes backing /api/search, ranked by textScore. Every search has
+    # an equality on user_id, so it prefixes the index and lookups only touch
+    # the requesting user's documents.
+    await replace_text_index(
+        db.questions,
+        [("user_id", 1), ("question", "text"), ("answer", "text")],
+        weights={"question": 3, "answer": 1},
+        name="questions_user_text"
+    )
+    await db.questions.create_index([("user_id", 1), ("ebook_id", 1), ("question_type", 1), ("difficulty", 1)])
+    await replace_text_index(
+        db.ebooks,
+        [("user_id", 1), ("title", "text"), ("extracted_text", "text")],
+        weights={"title": 10, "extracted_text": 1},
+        name="ebooks_user_text"
+    )
+
+# Strong references to startup tasks so they are not garbage collected
+background_tasks = set()
+
+def start_background_task(coro):
+    task = asyncio.create_task(coro)
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+    return task
+
+async def run_warm_up(features: List[str]):
+    try:
+        await asyncio.to_thread(warm_up, features)
+        logger.info(f"Warmed up features: {', '.join(features)}")
+    except Exception as e:
+        logger.error(f"Failed to warm up features {features}: {e}")
+
+@app.on_event("startup")
+async def warm_up_features():
+    # Imported in the background so the worker starts serving immediately
+    if WARMUP_FEATURES:
+        start_background_task(run_warm_up(WARMUP_FEATURES))
+
+@app.on_event("startup")
+async def resume_ingestion():
+    start_background_task(resume_extractions(db))
+    start_background_task(expire_upload_sessions())
+
+async def expire_upload_sessions():
+    """
+    Periodically delete abandoned upload sessions and their partial files
+    """
+    while True:
+        try:
+            cutoff = (datetime.now(timezone.utc) - UPLOAD_SESSION_TTL).isoformat()
+            stale = db.upload_sessions.find(
+                {"status": "uploading", "created_at": {"$lt": cutoff}},
+                {"_id": 0, "id": 1, "file_path": 1}
+            )
+            async for session in stale:
+                # Skip sessions completed since the query ran
+                result = await db.upload_sessions.delete_one({"id": session['id'], "status": "uploading"})
+                if result.deleted_count:
+                    Path(session['file_path']).unlink(missing_ok=True)
+        except Exception as e:
+            logger.warning(f"Failed to expire upload sessions: {e}")
+        await asyncio.sleep(UPLOAD_SWEEP_INTERVAL)
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
     client.close()
\ No newline at end of file
@@ -0,0 +1,149 @@
+import asyncio
+import math
+import os
+import uuid
+from datetime import datetime, timezone, timedelta
+from typing import Optional
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+# route -> (tokens refilled per second, bucket capacity)
+ROUTE_RATES = {
+    "ebooks_upload": (10 / 60, 5),
+    "questions_generate": (6 / 60, 4),
+    "assignments_generate": (20 / 60, 10),
+}
+# Expensive operations a single user may run at once, across routes
+USER_CONCURRENCY = int(os.environ.get('ADMISSION_USER_CONCURRENCY', '2'))
+# Expensive operations in flight across all users and workers
+GLOBAL_INFLIGHT = int(os.environ.get('ADMISSION_GLOBAL_INFLIGHT', '32'))
+# How long a request waits for a slot before it is shed
+QUEUE_TIMEOUT = float(os.environ.get('ADMISSION_QUEUE_TIMEOUT', '10'))
+# Slots held by a crashed worker are reclaimed after this long
+LEASE_TTL = timedelta(minutes=5)
+
+_POLL_INITIAL = 0.1
+_POLL_MAX = 1.0
+
+class AdmissionRejected(Exception):
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+def refill(tokens: Optional[float], elapsed: float, rate: float, capacity: float) -> float:
+    """
+    Tokens in a bucket `elapsed` seconds after it last held `tokens`; a new
+    bucket starts full. bucket_pipeline computes the same thing in Mongo.
+    """
+    if tokens is None:
+        return capacity
+    return min(capacity, tokens + elapsed * rate)
+
+def retry_after(tokens: float, rate: float) -> float:
+    """
+    Seconds until a bucket holding `tokens` has a whole token again
+    """
+    return max(0.0, (1 - tokens) / rate)
+
+def retry_after_header(seconds: float) -> str:
+    """
+    Retry-After value: whole seconds, rounded up, never 0
+    """
+    return str(max(1, math.ceil(seconds)))
+
+def bucket_pipeline(now: datetime, rate: float, capacity: float) -> list:
+    """
+    Update pipeline that refills a bucket to `now` and takes a token if one
+    is available, recording the outcome in `allowed`
+    """
+    elapsed = {"$divide": [{"$subtract": [now, {"$ifNull": ["$updated_at", now]}]}, 1000]}
+    refilled = {"$min": [capacity, {"$add": [{"$ifNull": ["$tokens", capacity]}, {"$multiply": [elapsed, rate]}]}]}
+    return [
+        {"$set": {"tokens": refilled, "updated_at": now}},
+        {"$set": {"allowed": {"$gte": ["$tokens", 1]}}},
+        {"$set": {"tokens": {"$cond": ["$allowed", {"$subtract": ["$tokens", 1]}, "$tokens"]}}},
+    ]
+
+async def take_token(db, user_id: str, route: str) -> float:
+    """
+    Consume one token from the user's bucket for a route. Returns 0 if a
+    token was taken, otherwise the seconds until one is available.
+
+    The refill and the take happen in a single pipeline update so concurrent
+    workers share the bucket safely.
+    """
+    rate, capacity = ROUTE_RATES[route]
+    bucket = await db.rate_limits.find_one_and_update(
+        {"_id": f"{route}:{user_id}"},
+        bucket_pipeline(datetime.now(timezone.utc), rate, capacity),
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    if bucket['allowed']:
+        return 0.0
+    return retry_after(bucket['tokens'], rate)
+
+async def acquire_slot(db, key: str, limit: int, lease_id: str) -> bool:
+    """
+    Take one of `limit` concurrent slots. Expired leases are dropped in the
+    same update, so slots leaked by crashed workers free themselves.
+    """
+    now = datetime.now(timezone.utc)
+    live = {
+        "$filter": {
+            "input": {"$ifNull": ["$leases", []]},
+            "as": "lease",
+            "cond": {"$gt": ["$$lease.expires_at", now]}
+        }
+    }
+    try:
+        await db.admission_slots.update_one(
+            {"_id": key, "$expr": {"$lt": [{"$size": live}, limit]}},
+            [{"$set": {"leases": {"$concatArrays": [live, [{"id": lease_id, "expires_at": now + LEASE_TTL}]]}}}],
+            upsert=True
+        )
+    except DuplicateKeyError:
+        # The document exists but is full, so the upsert collided with it
+        return False
+    return True
+
+async def release_slot(db, key: str, lease_id: str) -> None:
+    await db.admission_slots.update_one({"_id": key}, {"$pull": {"leases": {"id": lease_id}}})
+
+async def _wait_for_slot(db, key: str, limit: int, lease_id: str, deadline: float) -> bool:
+    loop = asyncio.get_running_loop()
+    delay = _POLL_INITIAL
+    while True:
+        if await acquire_slot(db, key, limit, lease_id):
+            return True
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            return False
+        await asyncio.sleep(min(delay, remaining))
+        delay = min(delay * 2, _POLL_MAX)
+
+async def admit(db, user_id: str, route: str) -> str:
+    """
+    Admit an expensive request or raise AdmissionRejected. Returns a lease id
+    to pass to release() once the work is done.
+    """
+    retry_after = await take_token(db, user_id, route)
+    if retry_after > 0:
+        raise AdmissionRejected("Rate limit exceeded", retry_after)
+
+    lease_id = str(uuid.uuid4())
+    deadline = asyncio.get_running_loop().time() + QUEUE_TIMEOUT
+
+    if not await _wait_for_slot(db, f"user:{user_id}", USER_CONCURRENCY, lease_id, deadline):
+        raise AdmissionRejected("Too many concurrent requests", QUEUE_TIMEOUT)
+    if not await _wait_for_slot(db, "global", GLOBAL_INFLIGHT, lease_id, deadline):
+        await release_slot(db, f"user:{user_id}", lease_id)
+        raise AdmissionRejected("Server busy", QUEUE_TIMEOUT)
+
+    return lease_id
+
+async def release(db, user_id: str, lease_id: str) -> None:
+    await release_slot(db, "global", lease_id)
+    await release_slot(db, f"user:{user_id}", lease_id)
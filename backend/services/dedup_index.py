@@ -0,0 +1,132 @@
+import re
+import zlib
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# MinHash / LSH parameters: 16 bands of 4 rows catch pairs above ~0.5 Jaccard
+# with high probability; candidates are then checked against THRESHOLD.
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 2
+THRESHOLD = 0.75
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+def _make_permutations(num_perm: int) -> List[Tuple[int, int]]:
+    # Deterministic so persisted signatures stay comparable across processes
+    perms = []
+    seed = 0x9E3779B97F4A7C15
+    for _ in range(num_perm):
+        seed = (seed * 6364136223846793005 + 1442695040888963407) & 0xFFFFFFFFFFFFFFFF
+        a = (seed >> 3) % _MERSENNE_PRIME or 1
+        seed = (seed * 6364136223846793005 + 1442695040888963407) & 0xFFFFFFFFFFFFFFFF
+        b = (seed >> 3) % _MERSENNE_PRIME
+        perms.append((a, b))
+    return perms
+
+_PERMUTATIONS = _make_permutations(NUM_PERM)
+
+def shingles(text: str) -> set:
+    """
+    Word shingles of normalised question text
+    """
+    words = _WORD_RE.findall(text.lower())
+    if len(words) < SHINGLE_SIZE:
+        return {" ".join(words)}
+    return {" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+def minhash_signature(text: str) -> Tuple[int, ...]:
+    hashes = [zlib.crc32(s.encode("utf-8")) for s in shingles(text)]
+    return tuple(
+        min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashes)
+        for a, b in _PERMUTATIONS
+    )
+
+def encode_signature(signature: Tuple[int, ...]) -> bytes:
+    return array("I", signature).tobytes()
+
+def decode_signature(data: bytes) -> Tuple[int, ...]:
+    values = array("I")
+    values.frombytes(bytes(data))
+    return tuple(values)
+
+class NearDuplicateIndex:
+    """
+    In-memory MinHash/LSH index of the questions generated for one e-book.
+
+    Signatures are persisted compactly (see to_document) so the index can be
+    reloaded per request and updated incrementally as questions are saved.
+    """
+
+    def __init__(self, threshold: float = THRESHOLD):
+        self.threshold = threshold
+        self.signatures: Dict[str, Tuple[int, ...]] = {}
+        self._buckets: List[Dict[Tuple[int, ...], List[str]]] = [{} for _ in range(BANDS)]
+
+    def __len__(self) -> int:
+        return len(self.signatures)
+
+    @staticmethod
+    def signature(text: str) -> Tuple[int, ...]:
+        return minhash_signature(text)
+
+    def insert(self, key: str, signature: Tuple[int, ...]) -> None:
+        self.signatures[key] = signature
+        for band, buckets in enumerate(self._buckets):
+            start = band * ROWS
+            buckets.setdefault(signature[start:start + ROWS], []).append(key)
+
+    def add(self, key: str, text: str) -> Tuple[int, ...]:
+        signature = self.signature(text)
+        self.insert(key, signature)
+        return signature
+
+    def find_duplicate(self, signature: Tuple[int, ...]) -> Optional[str]:
+        """
+        Key of an indexed question whose estimated Jaccard similarity is at
+        least the threshold, or None.
+        """
+        checked = set()
+        for band, buckets in enumerate(self._buckets):
+            start = band * ROWS
+            for key in buckets.get(signature[start:start + ROWS], ()):
+                if key in checked:
+                    continue
+                checked.add(key)
+                other = self.signatures[key]
+                matches = sum(1 for x, y in zip(signature, other) if x == y)
+                if matches / NUM_PERM >= self.threshold:
+                    return key
+        return None
+
+    def is_duplicate(self, text: str) -> bool:
+        return self.find_duplicate(self.signature(text)) is not None
+
+    def to_document(self) -> dict:
+        return {
+            "num_perm": NUM_PERM,
+            "signatures": {key: encode_signature(sig) for key, sig in self.signatures.items()}
+        }
+
+    @classmethod
+    def from_document(cls, doc: dict, threshold: float = THRESHOLD) -> Optional["NearDuplicateIndex"]:
+        """
+        Load a persisted index, or None if it was built with other parameters
+        and needs rebuilding.
+        """
+        if doc.get("num_perm") != NUM_PERM:
+            return None
+        index = cls(threshold)
+        for key, data in doc.get("signatures", {}).items():
+            index.insert(key, decode_signature(data))
+        return index
+
+    @classmethod
+    def from_questions(cls, questions: Iterable[dict], threshold: float = THRESHOLD) -> "NearDuplicateIndex":
+        index = cls(threshold)
+        for q in questions:
+            index.add(q['id'], q['question'])
+        return index
@@ -0,0 +1,149 @@
+import asyncio
+import logging
+import os
+import uuid
+from datetime import datetime, timezone, timedelta
+
+from services.text_extraction import iter_sections, count_sections
+from services.question_pool import content_hash, prefill_pools
+
+logger = logging.getLogger(__name__)
+
+# Characters of extracted text kept on the e-book document
+MAX_STORED_TEXT = 50000
+# An extraction whose worker stops renewing its lease is taken over by another
+EXTRACTION_LEASE = timedelta(minutes=2)
+RESUME_SWEEP_INTERVAL = 60
+# Extractions (PDF parsing, zip inflation) running at once in this process;
+# the rest wait their turn without holding a lease
+EXTRACTION_CONCURRENCY = int(os.environ.get('EXTRACTION_CONCURRENCY', '2'))
+
+WORKER_ID = str(uuid.uuid4())
+
+_extraction_tasks = {}
+_extraction_slots = asyncio.Semaphore(EXTRACTION_CONCURRENCY)
+
+def _unleased(now: datetime) -> dict:
+    """
+    Extractions in progress that no worker holds a live lease on
+    """
+    return {
+        "extraction_status": "processing",
+        "$or": [
+            {"extraction_lease_until": None},
+            {"extraction_lease_until": {"$lt": now}}
+        ]
+    }
+
+async def claim_extraction(db, ebook_id: str):
+    """
+    Take the lease on an unfinished extraction. Returns the e-book document
+    or None if it is finished or another worker holds it.
+    """
+    now = datetime.now(timezone.utc)
+    return await db.ebooks.find_one_and_update(
+        {"id": ebook_id, **_unleased(now)},
+        {"$set": {"extraction_worker": WORKER_ID, "extraction_lease_until": now + EXTRACTION_LEASE}},
+        projection={"_id": 0, "extracted_text": 0}
+    )
+
+async def _run_extraction(db, ebook: dict) -> None:
+    ebook_id = ebook['id']
+    owner = {"id": ebook_id, "extraction_worker": WORKER_ID}
+
+    if ebook.get('sections_total') is None:
+        total = await asyncio.to_thread(count_sections, ebook['file_path'], ebook['file_type'])
+        await db.ebooks.update_one(owner, {"$set": {"sections_total": total}})
+
+    sections = iter_sections(ebook['file_path'], ebook['file_type'], start=ebook.get('sections_done', 0))
+    while True:
+        section = await asyncio.to_thread(next, sections, None)
+        if section is None:
+            break
+        cursor, text = section
+        # Text, word count and progress move together so a resumed worker
+        # never duplicates or skips a section
+        result = await db.ebooks.update_one(owner, [{"$set": {
+            "extracted_text": {"$substrCP": [
+                {"$concat": ["$extracted_text", {"$literal": text + "\n"}]},
+                0,
+                MAX_STORED_TEXT
+            ]},
+            "word_count": {"$add": ["$word_count", len(text.split())]},
+            "sections_done": cursor,
+            "extraction_lease_until": datetime.now(timezone.utc) + EXTRACTION_LEASE
+        }}])
+        if result.matched_count == 0:
+            logger.warning(f"Lost extraction lease for e-book {ebook_id}")
+            return
+
+    doc = await db.ebooks.find_one({"id": ebook_id}, {"_id": 0, "extracted_text": 1})
+    extracted_text = doc['extracted_text'].strip()
+    text_hash = content_hash(extracted_text)
+    await db.ebooks.update_one(owner, {
+        "$set": {"extracted_text": extracted_text, "content_hash": text_hash, "extraction_status": "complete"},
+        "$unset": {"extraction_worker": "", "extraction_lease_until": ""}
+    })
+    prefill_pools(db, text_hash, extracted_text)
+
+def schedule_extraction(db, ebook_id: str) -> None:
+    """
+    Queue an extraction; it is claimed once one of this process's slots is free
+    """
+    if ebook_id in _extraction_tasks:
+        return
+
+    async def run():
+        try:
+            async with _extraction_slots:
+                ebook = await claim_extraction(db, ebook_id)
+                if ebook is None:
+                    return
+                await _run_extraction(db, ebook)
+        except Exception as e:
+            logger.warning(f"Failed to extract text for e-book {ebook_id}: {e}")
+            await db.ebooks.update_one(
+                {"id": ebook_id, "extraction_worker": WORKER_ID},
+                {"$set": {"extraction_status": "failed", "extraction_error": str(e)}}
+            )
+        finally:
+            _extraction_tasks.pop(ebook_id, None)
+
+    _extraction_tasks[ebook_id] = asyncio.create_task(run())
+
+async def start_extraction(db, ebook_id: str) -> None:
+    schedule_extraction(db, ebook_id)
+
+async def retry_extraction(db, ebook_id: str, user_id: str) -> bool:
+    """
+    Put a failed extraction back in progress, resuming after the last
+    section that was stored. Returns False if it had not failed.
+    """
+    result = await db.ebooks.update_one(
+        {"id": ebook_id, "user_id": user_id, "extraction_status": "failed"},
+        {
+            "$set": {"extraction_status": "processing"},
+            "$unset": {"extraction_error": "", "extraction_worker": "", "extraction_lease_until": ""}
+        }
+    )
+    if result.modified_count == 0:
+        return False
+    await start_extraction(db, ebook_id)
+    return True
+
+async def resume_extractions(db) -> None:
+    """
+    Periodically pick up extractions left behind by stopped workers
+    """
+    while True:
+        try:
+            orphaned = db.ebooks.find(
+                {"id": {"$nin": list(_extraction_tasks)}, **_unleased(datetime.now(timezone.utc))},
+                {"_id": 0, "id": 1, "sections_done": 1}
+            )
+            async for ebook in orphaned:
+                logger.info(f"Resuming extraction of e-book {ebook['id']} from cursor {ebook.get('sections_done', 0)}")
+                schedule_extraction(db, ebook['id'])
+        except Exception as e:
+            logger.warning(f"Failed to resume extractions: {e}")
+        await asyncio.sleep(RESUME_SWEEP_INTERVAL)
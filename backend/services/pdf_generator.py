@@ -1,12 +1,180 @@
-from reportlab.lib.pagesizes import A4
-from reportlab.lib.units import inch
-from reportlab.pdfgen import canvas
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak
-from reportlab.lib.enums import TA_CENTER, TA_LEFT
-from reportlab.lib import colors
 from io import BytesIO
 from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+import hashlib
+import random
+
+FONTS_DIR = Path(__file__).parent.parent / "fonts"
+
+# Each style pairs a bundled OFL handwriting font (see fonts/README.md) with
+# how unsteady the hand is: baseline drift in points, size wobble as a
+# fraction of the font size, and slant as a horizontal shear. `scale` makes
+# up for the narrow face so text reads at the requested size. All styles
+# share Amatic SC, an all-small-caps face, and "cursive" is a sheared
+# upright face rather than a joined script (see fonts/README.md).
+HANDWRITING_STYLES = {
+    "neat": {
+        "font": "Handwriting-Neat", "ttf": "AmaticSC-Bold.ttf", "fallback": "Helvetica",
+        "scale": 1.45, "baseline_jitter": 0.4, "size_jitter": 0.015, "slant": 0.0,
+    },
+    "average": {
+        "font": "Handwriting-Average", "ttf": "AmaticSC-Regular.ttf", "fallback": "Times-Roman",
+        "scale": 1.5, "baseline_jitter": 0.8, "size_jitter": 0.03, "slant": 0.06,
+    },
+    "cursive": {
+        "font": "Handwriting-Cursive", "ttf": "AmaticSC-Regular.ttf", "fallback": "Times-Italic",
+        "scale": 1.5, "baseline_jitter": 1.0, "size_jitter": 0.03, "slant": 0.22,
+    },
+}
+DEFAULT_HANDWRITING = "neat"
+
+PEN_COLORS = {
+    "blue": "#1f3a93",
+    "black": "#1c1c1c",
+    "red": "#b22222",
+    "green": "#1e6b3a",
+}
+DEFAULT_PEN_COLOR = "blue"
+
+def preload_pdf_renderer() -> None:
+    """
+    Import ReportLab and register the handwriting fonts ahead of the first
+    assignment export
+    """
+    for style in HANDWRITING_STYLES:
+        _register_handwriting_font(style)
+
+def _handwriting_style(style: str) -> dict:
+    return HANDWRITING_STYLES.get(style, HANDWRITING_STYLES[DEFAULT_HANDWRITING])
+
+@lru_cache(maxsize=None)
+def _register_handwriting_font(style: str) -> str:
+    """
+    Register the TTF for a style once per process and return its font name
+    """
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+
+    profile = _handwriting_style(style)
+    ttf_path = FONTS_DIR / profile["ttf"]
+    if not ttf_path.exists():
+        return profile["fallback"]
+    pdfmetrics.registerFont(TTFont(profile["font"], str(ttf_path)))
+    return profile["font"]
+
+@lru_cache(maxsize=65536)
+def _word_width(word: str, font_name: str, font_size: float) -> float:
+    from reportlab.pdfbase.pdfmetrics import stringWidth
+
+    return stringWidth(word, font_name, font_size)
+
+def _split_long_word(word: str, font_name: str, font_size: float, max_width: float) -> list:
+    """
+    Break a word wider than a line into pieces that fit, by glyph width
+    """
+    pieces, piece, width = [], "", 0.0
+    for ch in word:
+        w = _word_width(ch, font_name, font_size)
+        if piece and width + w > max_width:
+            pieces.append(piece)
+            piece, width = "", 0.0
+        piece += ch
+        width += w
+    pieces.append(piece)
+    return pieces
+
+@lru_cache(maxsize=4096)
+def _wrap_lines(text: str, font_name: str, font_size: float, max_width: float) -> tuple:
+    """
+    Greedy line wrap using memoized word widths. Words wider than a whole
+    line (long URLs, formulas) are split across lines.
+    """
+    space = _word_width(" ", font_name, font_size)
+    lines = []
+    for paragraph in text.split("\n"):
+        line, width = [], 0.0
+        for word in paragraph.split():
+            w = _word_width(word, font_name, font_size)
+            if line and width + space + w > max_width:
+                lines.append(" ".join(line))
+                line, width = [], 0.0
+            if w > max_width:
+                *full, word = _split_long_word(word, font_name, font_size, max_width)
+                lines.extend(full)
+                w = _word_width(word, font_name, font_size)
+            width += (space if line else 0.0) + w
+            line.append(word)
+        lines.append(" ".join(line))
+    return tuple(lines)
+
+class _HandwritingWriter:
+    """
+    Lays out wrapped text on a canvas, drawing each glyph with slight jitter
+    """
+
+    def __init__(self, pdf, font_name: str, profile: dict, ink, seed: int, page_size, margin: float):
+        self.pdf = pdf
+        self.font_name = font_name
+        # Core fallback fonts are already legible at the nominal size
+        self.scale = profile["scale"] if font_name == profile["font"] else 1.0
+        self.baseline_jitter = profile["baseline_jitter"]
+        self.size_jitter = profile["size_jitter"]
+        self.slant = profile["slant"]
+        self.ink = ink
+        self.rng = random.Random(seed)
+        self.page_width, self.page_height = page_size
+        self.margin = margin
+        self.y = self.page_height - margin
+
+    def new_page(self):
+        self.pdf.showPage()
+        self.y = self.page_height - self.margin
+
+    def gap(self, height: float):
+        self.y -= height
+
+    def write(self, text: str, font_size: float, indent: float = 0.0, centered: bool = False):
+        font_size = round(font_size * self.scale, 1)
+        line_height = font_size * 1.3
+        # Leave room for glyphs drawn slightly larger than the nominal size
+        # and for the slant pushing the top of the line to the right
+        max_width = (self.page_width - 2 * self.margin - indent) * (1 - self.size_jitter) - self.slant * font_size
+        for line in _wrap_lines(text, self.font_name, font_size, max_width):
+            if self.y - line_height < self.margin:
+                self.new_page()
+            self.y -= line_height
+            x = self.margin + indent
+            if centered:
+                x = (self.page_width - _word_width(line, self.font_name, font_size)) / 2
+            self._draw_line(line, x, self.y, font_size)
+
+    def _draw_line(self, line: str, x: float, y: float, font_size: float):
+        rng = self.rng
+        jitter = self.baseline_jitter
+        text = self.pdf.beginText()
+        text.setTextTransform(1, 0, self.slant, 1, x, y + rng.uniform(-jitter, jitter))
+        text.setFillColor(self.ink)
+        # Size wobbles per word and the baseline drifts per glyph in 0.2pt
+        # steps; glyphs sharing a rise are emitted as one run to keep the
+        # content stream small.
+        rise = 0.0
+        for i, word in enumerate(line.split(" ")):
+            text.setFont(self.font_name, round(font_size * (1 + rng.uniform(-self.size_jitter, self.size_jitter)), 1))
+            run = " " if i else ""
+            for ch in word:
+                step = rng.choice((-0.2, 0.0, 0.2))
+                new_rise = max(-jitter, min(jitter, round(rise + step, 1)))
+                if new_rise != rise and run:
+                    text.textOut(run)
+                    run = ""
+                if new_rise != rise:
+                    text.setRise(new_rise)
+                    rise = new_rise
+                run += ch
+            if run:
+                text.textOut(run)
+        self.pdf.drawText(text)
 
 def generate_assignment_pdf(
     questions: list,
@@ -17,63 +185,53 @@ def generate_assignment_pdf(
     pen_color: str
 ) -> bytes:
     """
-    Generate a PDF assignment with questions and answers
+    Generate a PDF assignment with questions and answers written in the
+    selected handwriting style and pen color
     """
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.units import inch
+    from reportlab.lib.colors import HexColor
+    from reportlab.pdfgen import canvas
+
     buffer = BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=A4, topMargin=0.75*inch, bottomMargin=0.75*inch)
-    
-    story = []
-    styles = getSampleStyleSheet()
-    
+    pdf = canvas.Canvas(buffer, pagesize=A4, pageCompression=1)
+    pdf.setTitle(f"{subject} Assignment")
+
+    font_name = _register_handwriting_font(handwriting_style)
+    ink = HexColor(PEN_COLORS.get(pen_color.lower(), PEN_COLORS[DEFAULT_PEN_COLOR]))
+    # Same inputs give the same jitter, so re-exports are identical
+    seed = int(hashlib.md5(f"{student_name}|{roll_number}|{subject}".encode("utf-8")).hexdigest()[:8], 16)
+    writer = _HandwritingWriter(pdf, font_name, _handwriting_style(handwriting_style), ink, seed, A4, 0.75 * inch)
+
     # Title Page
-    title_style = styles['Title']
-    title_style.alignment = TA_CENTER
-    title = Paragraph(f"<b>{subject}</b>", title_style)
-    story.append(title)
-    story.append(Spacer(1, 0.3*inch))
-    
-    subtitle_style = styles['Heading2']
-    subtitle_style.alignment = TA_CENTER
-    subtitle = Paragraph("Assignment", subtitle_style)
-    story.append(subtitle)
-    story.append(Spacer(1, 0.5*inch))
-    
+    writer.gap(1.5 * inch)
+    writer.write(subject, 28, centered=True)
+    writer.gap(0.3 * inch)
+    writer.write("Assignment", 20, centered=True)
+    writer.gap(0.5 * inch)
+
     # Student Details
-    normal_style = styles['Normal']
-    normal_style.alignment = TA_CENTER
-    
     details = [
-        f"<b>Student Name:</b> {student_name}",
-        f"<b>Roll Number:</b> {roll_number}",
-        f"<b>Date:</b> {datetime.now().strftime('%B %d, %Y')}",
-        f"<b>Handwriting Style:</b> {handwriting_style}",
-        f"<b>Pen Color:</b> {pen_color.capitalize()}"
+        f"Student Name: {student_name}",
+        f"Roll Number: {roll_number}",
+        f"Date: {datetime.now().strftime('%B %d, %Y')}",
     ]
-    
     for detail in details:
-        story.append(Paragraph(detail, normal_style))
-        story.append(Spacer(1, 0.1*inch))
-    
-    story.append(PageBreak())
-    
+        writer.write(detail, 14, centered=True)
+        writer.gap(0.1 * inch)
+
+    writer.new_page()
+
     # Questions and Answers
-    question_style = styles['Heading3']
-    answer_style = styles['Normal']
-    
     for idx, q in enumerate(questions, 1):
-        # Question
-        q_text = f"<b>Q{idx}. [{q['question_type']}]</b> {q['question']}"
-        story.append(Paragraph(q_text, question_style))
-        story.append(Spacer(1, 0.2*inch))
-        
-        # Answer
-        a_text = f"<b>Answer:</b> {q['answer']}"
-        story.append(Paragraph(a_text, answer_style))
-        story.append(Spacer(1, 0.4*inch))
-    
-    doc.build(story)
-    
+        writer.write(f"Q{idx}. [{q['question_type']}] {q['question']}", 14)
+        writer.gap(0.15 * inch)
+        writer.write(f"Answer: {q['answer']}", 13, indent=0.25 * inch)
+        writer.gap(0.4 * inch)
+
+    pdf.save()
+
     pdf_bytes = buffer.getvalue()
     buffer.close()
-    
-    return pdf_bytes
\ No newline at end of file
+
+    return pdf_bytes
@@ -1,28 +1,82 @@
 import os
 from dotenv import load_dotenv
-from emergentintegrations.llm.chat import LlmChat, UserMessage
 import json
+from typing import Callable, Optional
 
 load_dotenv()
 
 EMERGENT_KEY = os.environ.get('EMERGENT_LLM_KEY')
 
-async def generate_questions_with_answers(
-    text_content: str,
-    question_types: list,
-    difficulty: str,
-    num_questions: int
-) -> list:
+# Follow-up calls made to top up a short or truncated response
+MAX_TOPUP_ATTEMPTS = 2
+
+_json_decoder = json.JSONDecoder()
+
+def preload_llm_client() -> None:
     """
-    Generate questions using OpenAI GPT via Emergent LLM integration
+    Import the LLM client ahead of the first generate request
     """
-    
-    # Truncate text if too long
-    max_chars = 8000
-    if len(text_content) > max_chars:
-        text_content = text_content[:max_chars] + "..."
-    
-    system_message = f"""You are an expert educational assessment designer. Generate {num_questions} high-quality academic questions from the provided text.
+    import emergentintegrations.llm.chat  # noqa: F401
+
+def _collect_questions(obj, questions: list) -> None:
+    """
+    Append a question object, or the items of a {"questions": [...]} wrapper
+    """
+    if not isinstance(obj, dict):
+        return
+    if 'question' in obj:
+        questions.append(obj)
+    elif isinstance(obj.get('questions'), list):
+        questions.extend(q for q in obj['questions'] if isinstance(q, dict))
+
+def parse_questions_response(response: str) -> list:
+    """
+    Recover every complete question object from a model response.
+
+    Tolerates code fences (balanced or not), leading/trailing prose and
+    output truncated mid-object; incomplete objects are dropped.
+    """
+    text = response.strip()
+
+    # Fast path: the whole response (minus fences) is valid JSON
+    unfenced = text
+    if unfenced.startswith("```"):
+        unfenced = unfenced.split("\n", 1)[1] if "\n" in unfenced else unfenced[3:]
+    if unfenced.rstrip().endswith("```"):
+        unfenced = unfenced.rstrip()[:-3]
+    try:
+        data = json.loads(unfenced)
+        if isinstance(data, (dict, list)):
+            questions = []
+            for obj in (data if isinstance(data, list) else [data]):
+                _collect_questions(obj, questions)
+            return questions
+    except json.JSONDecodeError:
+        pass
+
+    # Slow path: decode each top-level object independently
+    questions = []
+    pos = text.find("{")
+    while pos != -1:
+        try:
+            obj, end = _json_decoder.raw_decode(text, pos)
+        except json.JSONDecodeError:
+            pos = text.find("{", pos + 1)
+            continue
+        _collect_questions(obj, questions)
+        pos = text.find("{", end)
+    return questions
+
+def _build_system_message(num_questions: int, question_types: list, difficulty: str, existing: list) -> str:
+    exclusions = ""
+    if existing:
+        listed = "\n".join(f"- {q['question']}" for q in existing)
+        exclusions = f"""
+
+Do NOT repeat or rephrase any of these already generated questions:
+{listed}"""
+
+    return f"""You are an expert educational assessment designer. Generate {num_questions} high-quality academic questions from the provided text.
 
 Difficulty Level: {difficulty}
 Question Types Needed: {', '.join(question_types)}
@@ -42,47 +96,109 @@ Return ONLY a valid JSON array with this exact format:
   }}
 ]
 
-IMPORTANT: Return ONLY the JSON array, no other text."""
+IMPORTANT: Return ONLY the JSON array, no other text.{exclusions}"""
+
+async def _request_questions(
+    text_content: str,
+    question_types: list,
+    difficulty: str,
+    num_questions: int,
+    existing: list
+) -> list:
+    from emergentintegrations.llm.chat import LlmChat, UserMessage
     
     user_prompt = f"""Text Content:
 {text_content}
 
 Generate {num_questions} questions with answers based on this content."""
-    
+
     chat = LlmChat(
         api_key=EMERGENT_KEY,
         session_id=f"qgen_{os.urandom(8).hex()}",
-        system_message=system_message
+        system_message=_build_system_message(num_questions, question_types, difficulty, existing)
     ).with_model("openai", "gpt-5.2")
-    
-    message = UserMessage(text=user_prompt)
-    response = await chat.send_message(message)
-    
-    # Parse JSON response
-    try:
-        # Extract JSON from response
-        response_text = response.strip()
-        if response_text.startswith("```json"):
-            response_text = response_text[7:-3].strip()
-        elif response_text.startswith("```"):
-            response_text = response_text[3:-3].strip()
-        
-        questions_data = json.loads(response_text)
-        
+
+    response = await chat.send_message(UserMessage(text=user_prompt))
+    return parse_questions_response(response)
+
+def _is_valid_question(q: dict) -> bool:
+    """
+    Question and answer must be non-empty strings, and type a string if given
+    """
+    for field in ('question', 'answer'):
+        if not isinstance(q.get(field), str) or not q[field].strip():
+            return False
+    return 'type' not in q or isinstance(q['type'], str)
+
+def _missing_types(question_types: list, questions: list) -> list:
+    """
+    Requested types not yet covered, or all requested types if every one is
+    already present.
+    """
+    covered = {q['type'] for q in questions}
+    missing = [t for t in question_types if t not in covered]
+    return missing or question_types
+
+async def generate_questions_with_answers(
+    text_content: str,
+    question_types: list,
+    difficulty: str,
+    num_questions: int,
+    is_duplicate: Optional[Callable[[str], bool]] = None
+) -> list:
+    """
+    Generate questions using OpenAI GPT via Emergent LLM integration.
+
+    If the model returns fewer usable questions than requested (or some are
+    rejected by is_duplicate), smaller follow-up calls ask only for the
+    missing count and types. The result may be short, or empty if every
+    candidate was a duplicate.
+    """
+
+    # Truncate text if too long
+    max_chars = 8000
+    if len(text_content) > max_chars:
+        text_content = text_content[:max_chars] + "..."
+
+    default_type = question_types[0] if question_types else 'Short Answer'
+    valid_questions = []
+    rejected = []
+    seen = set()
+    requested_types = question_types
+
+    for _ in range(1 + MAX_TOPUP_ATTEMPTS):
+        needed = num_questions - len(valid_questions)
+        if needed <= 0:
+            break
+
+        parsed = await _request_questions(
+            text_content,
+            requested_types,
+            difficulty,
+            needed,
+            valid_questions + rejected
+        )
+
         # Validate and ensure correct types
-        valid_questions = []
-        for q in questions_data:
-            if 'question' in q and 'answer' in q:
-                if 'type' not in q:
-                    q['type'] = question_types[0] if question_types else 'Short Answer'
-                valid_questions.append(q)
-        
-        return valid_questions[:num_questions]
-    
-    except json.JSONDecodeError:
-        # Fallback: parse manually if JSON fails
-        return [{
-            "type": question_types[0] if question_types else "Short Answer",
-            "question": "Generated question based on content",
-            "answer": response[:500]
-        }]
\ No newline at end of file
+        for q in parsed:
+            if not _is_valid_question(q):
+                continue
+            key = " ".join(str(q['question']).lower().split())
+            if key in seen:
+                continue
+            seen.add(key)
+            if is_duplicate and is_duplicate(q['question']):
+                rejected.append(q)
+                continue
+            if 'type' not in q:
+                q['type'] = default_type
+            valid_questions.append(q)
+
+        requested_types = _missing_types(question_types, valid_questions)
+
+    # Only questions rejected as duplicates means the e-book's question space
+    # is used up, which callers handle as an empty result rather than an error
+    if not valid_questions and not rejected:
+        raise ValueError("No new questions could be parsed from the model response")
+
+    return valid_questions[:num_questions]
@@ -0,0 +1,163 @@
+import asyncio
+import hashlib
+import logging
+import uuid
+from datetime import datetime, timezone
+
+from pymongo import ReturnDocument
+
+from services.question_generator import generate_questions_with_answers
+from services.dedup_index import NearDuplicateIndex
+
+logger = logging.getLogger(__name__)
+
+# Pools are keyed by (content hash, question type, difficulty) and shared by
+# every user who uploaded the same text.
+POOL_TARGET_SIZE = 20
+POOL_REFILL_THRESHOLD = 5
+POOL_FILL_BATCH = 10
+# Requests for a combination before it is considered popular and kept filled
+POPULAR_REQUEST_COUNT = 3
+# Combinations filled as soon as an e-book is uploaded
+PREFILL_COMBINATIONS = [("MCQ", "medium"), ("Short Answer", "medium")]
+
+_fill_tasks = {}
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+async def ensure_pool_indexes(db) -> None:
+    await db.question_pool.create_index(
+        [("content_hash", 1), ("difficulty", 1), ("question_type", 1), ("created_at", 1)]
+    )
+    await db.question_pool_stats.create_index(
+        [("content_hash", 1), ("question_type", 1), ("difficulty", 1)],
+        unique=True
+    )
+
+async def _claim_one(db, text_hash: str, question_type: str, difficulty: str):
+    return await db.question_pool.find_one_and_delete(
+        {"content_hash": text_hash, "difficulty": difficulty, "question_type": question_type},
+        projection={"_id": 0},
+        sort=[("created_at", 1)]
+    )
+
+async def claim_from_pool(db, text_hash: str, question_types: list, difficulty: str, num_questions: int) -> list:
+    """
+    Claim up to num_questions unused questions, spread across the requested
+    types. Each question is removed with find_one_and_delete, so concurrent
+    requests never receive the same one and a dying worker orphans nothing.
+
+    All claims of a round are issued concurrently, so a pool that can serve
+    the request costs one round trip; each type that runs dry adds at most
+    one more round to redistribute its share.
+    """
+    claimed = []
+    active = list(question_types)
+    while active and len(claimed) < num_questions:
+        # Spread the remaining count round-robin over types not yet dry
+        wanted = [active[i % len(active)] for i in range(num_questions - len(claimed))]
+        results = await asyncio.gather(*(_claim_one(db, text_hash, t, difficulty) for t in wanted))
+        for question_type, q in zip(wanted, results):
+            if q is None:
+                if question_type in active:
+                    active.remove(question_type)
+                continue
+            claimed.append({"type": q['question_type'], "question": q['question'], "answer": q['answer']})
+
+    return claimed
+
+async def return_to_pool(db, text_hash: str, difficulty: str, questions: list) -> None:
+    if not questions:
+        return
+    await db.question_pool.insert_many([_pool_doc(text_hash, difficulty, q) for q in questions])
+
+def _pool_doc(text_hash: str, difficulty: str, q: dict) -> dict:
+    return {
+        "id": str(uuid.uuid4()),
+        "content_hash": text_hash,
+        "question_type": q['type'],
+        "difficulty": difficulty,
+        "question": q['question'],
+        "answer": q['answer'],
+        "created_at": datetime.now(timezone.utc).isoformat()
+    }
+
+async def fill_pool(db, text_hash: str, text_content: str, question_type: str, difficulty: str) -> int:
+    """
+    Top a pool up towards POOL_TARGET_SIZE. Returns the number of questions added.
+    """
+    query = {"content_hash": text_hash, "difficulty": difficulty, "question_type": question_type}
+    pooled = await db.question_pool.find(query, {"_id": 0, "id": 1, "question": 1}).to_list(None)
+    needed = min(POOL_FILL_BATCH, POOL_TARGET_SIZE - len(pooled))
+    if needed <= 0:
+        return 0
+
+    index = NearDuplicateIndex.from_questions(pooled)
+
+    def is_duplicate(text: str) -> bool:
+        signature = index.signature(text)
+        if index.find_duplicate(signature) is not None:
+            return True
+        index.insert(str(uuid.uuid4()), signature)
+        return False
+
+    questions = await generate_questions_with_answers(
+        text_content,
+        [question_type],
+        difficulty,
+        needed,
+        is_duplicate=is_duplicate
+    )
+    if not questions:
+        return 0
+    # Asked for a single type, so file everything under it
+    await db.question_pool.insert_many(
+        [_pool_doc(text_hash, difficulty, {**q, 'type': question_type}) for q in questions]
+    )
+    return len(questions)
+
+def schedule_pool_fill(db, text_hash: str, text_content: str, question_type: str, difficulty: str) -> None:
+    """
+    Fill a pool in the background; at most one fill per pool runs per process.
+    """
+    key = (text_hash, question_type, difficulty)
+    if key in _fill_tasks:
+        return
+
+    async def run():
+        try:
+            added = await fill_pool(db, text_hash, text_content, question_type, difficulty)
+            logger.info(f"Added {added} questions to pool {question_type}/{difficulty} for {text_hash[:12]}")
+        except Exception as e:
+            logger.warning(f"Failed to fill question pool {question_type}/{difficulty}: {e}")
+        finally:
+            _fill_tasks.pop(key, None)
+
+    _fill_tasks[key] = asyncio.create_task(run())
+
+def prefill_pools(db, text_hash: str, text_content: str) -> None:
+    for question_type, difficulty in PREFILL_COMBINATIONS:
+        schedule_pool_fill(db, text_hash, text_content, question_type, difficulty)
+
+async def record_pool_demand(db, text_hash: str, text_content: str, question_types: list, difficulty: str) -> None:
+    """
+    Count a request per combination and refill pools that are popular and
+    running low. Types are handled concurrently: two round trips in all.
+    """
+    async def record(question_type: str):
+        stats = await db.question_pool_stats.find_one_and_update(
+            {"content_hash": text_hash, "question_type": question_type, "difficulty": difficulty},
+            {"$inc": {"requests": 1}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        if stats['requests'] < POPULAR_REQUEST_COUNT:
+            return
+        available = await db.question_pool.count_documents(
+            {"content_hash": text_hash, "question_type": question_type, "difficulty": difficulty}
+        )
+        if available < POOL_REFILL_THRESHOLD:
+            schedule_pool_fill(db, text_hash, text_content, question_type, difficulty)
+
+    await asyncio.gather(*(record(question_type) for question_type in question_types))
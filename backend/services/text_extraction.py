@@ -1,9 +1,37 @@
-import PyPDF2
-from docx import Document
 import io
-import ebooklib
-from ebooklib import epub
-from bs4 import BeautifulSoup
+import os
+import codecs
+import importlib
+import posixpath
+import re
+import zipfile
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from html.parser import HTMLParser
+from typing import Iterator, List, Optional, Tuple
+from urllib.parse import unquote
+
+# Parser libraries are imported on first use of their file type so the API
+# process starts without loading all of them.
+_EXTRACTOR_MODULES = {
+    'pdf': ['PyPDF2'],
+    'docx': [],
+    'epub': ['lxml.etree'],
+}
+
+def preload_extractors(file_types: list = None) -> None:
+    """
+    Import parser libraries ahead of the first upload
+    """
+    if file_types is None:
+        file_types = list(_EXTRACTOR_MODULES)
+    for file_type in file_types:
+        for module in _EXTRACTOR_MODULES.get(file_type, []):
+            try:
+                importlib.import_module(module)
+            except ImportError:
+                # Optional accelerators (lxml) have pure-Python fallbacks
+                pass
 
 async def extract_text_from_file(file_content: bytes, file_type: str) -> str:
     """
@@ -21,6 +49,8 @@ async def extract_text_from_file(file_content: bytes, file_type: str) -> str:
         raise ValueError(f"Unsupported file type: {file_type}")
 
 def extract_from_pdf(file_content: bytes) -> str:
+    import PyPDF2
+    
     pdf_file = io.BytesIO(file_content)
     pdf_reader = PyPDF2.PdfReader(pdf_file)
     text = ""
@@ -29,16 +59,313 @@ def extract_from_pdf(file_content: bytes) -> str:
     return text.strip()
 
 def extract_from_docx(file_content: bytes) -> str:
-    doc_file = io.BytesIO(file_content)
-    doc = Document(doc_file)
-    text = "\n".join([para.text for para in doc.paragraphs])
-    return text.strip()
+    return "\n".join(iter_docx_text(file_content)).strip()
+
+_W_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_MC_FALLBACK = "{http://schemas.openxmlformats.org/markup-compatibility/2006}Fallback"
+
+def iter_docx_text(file_content: bytes) -> Iterator[str]:
+    """
+    Yield paragraph and table-row text of a DOCX in document order.
+
+    Only word/document.xml is decompressed, and it is parsed incrementally,
+    so embedded media never touches memory.
+    """
+    with zipfile.ZipFile(io.BytesIO(file_content)) as zf:
+        with zf.open("word/document.xml") as document_xml:
+            yield from _iter_document_xml(document_xml)
+
+def _iter_document_xml(source) -> Iterator[str]:
+    paragraphs = []  # run text of each open paragraph (text boxes nest them)
+    tables = []  # {"row": cells of the open row, "cell": paragraphs of the open cell}
+    body = None
+    body_depth = depth = 0
+    fallback_depth = 0  # inside mc:Fallback, which repeats mc:Choice content
+
+    for event, elem in ET.iterparse(source, events=("start", "end")):
+        tag = elem.tag
+        if event == "start":
+            depth += 1
+            if tag == _MC_FALLBACK:
+                fallback_depth += 1
+            elif fallback_depth:
+                # Nothing inside a Fallback is pushed, matching the end side
+                pass
+            elif tag == _W_NS + "body":
+                body, body_depth = elem, depth
+            elif tag == _W_NS + "p":
+                paragraphs.append([])
+            elif tag == _W_NS + "tbl":
+                tables.append({"row": [], "cell": []})
+            elif tag == _W_NS + "tr":
+                tables[-1]["row"] = []
+            elif tag == _W_NS + "tc":
+                tables[-1]["cell"] = []
+            continue
+
+        depth -= 1
+        if tag == _MC_FALLBACK:
+            fallback_depth -= 1
+        elif fallback_depth:
+            pass
+        elif tag == _W_NS + "t" and paragraphs:
+            paragraphs[-1].append(elem.text or "")
+        elif tag == _W_NS + "tab" and paragraphs:
+            paragraphs[-1].append("\t")
+        elif tag in (_W_NS + "br", _W_NS + "cr") and paragraphs:
+            paragraphs[-1].append("\n")
+        elif tag == _W_NS + "p":
+            text = "".join(paragraphs.pop()).strip()
+            if tables:
+                tables[-1]["cell"].append(text)
+            elif text:
+                yield text
+        elif tag == _W_NS + "tc":
+            cell = tables[-1]["cell"]
+            tables[-1]["row"].append(" ".join(p for p in cell if p))
+        elif tag == _W_NS + "tr":
+            line = "\t".join(tables[-1]["row"])
+            if len(tables) > 1:
+                # Nested table rows become part of the enclosing cell
+                tables[-2]["cell"].append(line)
+            elif line.strip():
+                yield line
+        elif tag == _W_NS + "tbl":
+            tables.pop()
+
+        # Drop each finished top-level block so memory stays flat
+        if body is not None and depth == body_depth:
+            body.clear()
 
 def extract_from_epub(file_content: bytes) -> str:
-    book = epub.read_epub(io.BytesIO(file_content))
-    text = ""
-    for item in book.get_items():
-        if item.get_type() == ebooklib.ITEM_DOCUMENT:
-            soup = BeautifulSoup(item.get_content(), 'html.parser')
-            text += soup.get_text() + "\n"
-    return text.strip()
\ No newline at end of file
+    return "\n".join(iter_epub_text(file_content)).strip()
+
+_EPUB_CONTAINER = "META-INF/container.xml"
+_OPF_NS = "{http://www.idpf.org/2007/opf}"
+_CONTAINER_NS = "{urn:oasis:names:tc:opendocument:xmlns:container}"
+_EPUB_DOCUMENT_TYPES = {"application/xhtml+xml", "text/html", "application/x-dtbook+xml"}
+_SKIPPED_TAGS = {"script", "style", "head", "noscript", "template"}
+_EPUB_WORKERS = min(4, os.cpu_count() or 1)
+
+def epub_spine(zf: zipfile.ZipFile) -> List[str]:
+    """
+    Archive paths of the content documents in reading order
+    """
+    container = ET.fromstring(zf.read(_EPUB_CONTAINER))
+    rootfile = container.find(f".//{_CONTAINER_NS}rootfile")
+    if rootfile is None:
+        raise ValueError("EPUB container has no rootfile")
+    opf_path = rootfile.get("full-path")
+    opf_dir = posixpath.dirname(opf_path)
+    opf = ET.fromstring(zf.read(opf_path))
+
+    manifest = {}
+    for item in opf.iter(f"{_OPF_NS}item"):
+        href = posixpath.normpath(posixpath.join(opf_dir, unquote(item.get("href", ""))))
+        manifest[item.get("id")] = (href, item.get("media-type"))
+
+    spine = [manifest[ref.get("idref")][0] for ref in opf.iter(f"{_OPF_NS}itemref") if ref.get("idref") in manifest]
+    if not spine:
+        spine = [href for href, media_type in manifest.values() if media_type in _EPUB_DOCUMENT_TYPES]
+
+    names = set(zf.namelist())
+    return [href for href in spine if href in names]
+
+_XML_ENCODING = re.compile(rb"<\?xml[^>]*?encoding=[\"']([A-Za-z0-9._-]+)[\"']")
+_BOMS = (
+    (codecs.BOM_UTF8, "utf-8"),
+    (codecs.BOM_UTF16_LE, "utf-16-le"),
+    (codecs.BOM_UTF16_BE, "utf-16-be"),
+)
+
+def _document_encoding(content: bytes) -> Tuple[str, bytes]:
+    """
+    Encoding of an EPUB content document and its bytes without any BOM.
+
+    Uses the BOM, then the XML declaration, then UTF-8 (the EPUB default),
+    so chapters without a declaration are not read as Latin-1.
+    """
+    for bom, encoding in _BOMS:
+        if content.startswith(bom):
+            return encoding, content[len(bom):]
+    match = _XML_ENCODING.match(content.lstrip()[:1024])
+    if match:
+        encoding = match.group(1).decode("ascii")
+        try:
+            codecs.lookup(encoding)
+            return encoding, content
+        except LookupError:
+            pass
+    return "utf-8", content
+
+class _TextCollector(HTMLParser):
+    """
+    Pure-Python fallback used when lxml is not installed
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self._skip = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _SKIPPED_TAGS:
+            self._skip += 1
+
+    def handle_endtag(self, tag):
+        if tag in _SKIPPED_TAGS and self._skip:
+            self._skip -= 1
+
+    def handle_data(self, data):
+        if not self._skip:
+            self.parts.append(data)
+
+def _html_to_text_fallback(content: bytes) -> str:
+    encoding, content = _document_encoding(content)
+    collector = _TextCollector()
+    collector.feed(content.decode(encoding, errors="ignore"))
+    collector.close()
+    return "".join(collector.parts)
+
+def _html_to_text_lxml(content: bytes) -> str:
+    from lxml import etree
+
+    # Parsed in C with the GIL released, so items can be processed in threads
+    encoding, content = _document_encoding(content)
+    if encoding != "utf-8":
+        # Transcode rare non-UTF-8 chapters rather than rely on libxml2
+        # knowing every codec name Python does
+        content = content.decode(encoding, errors="ignore").encode("utf-8")
+    parser = etree.HTMLParser(recover=True, remove_comments=True, remove_pis=True, encoding="utf-8")
+    root = etree.fromstring(content, parser)
+    if root is None:
+        return ""
+    etree.strip_elements(root, *_SKIPPED_TAGS, with_tail=False)
+    return "".join(root.itertext())
+
+def _html_to_text():
+    try:
+        import lxml.etree  # noqa: F401
+        return _html_to_text_lxml
+    except ImportError:
+        return _html_to_text_fallback
+
+def iter_epub_text(file_content: bytes) -> Iterator[str]:
+    """
+    Yield the text of each spine document in reading order.
+
+    Documents are read straight from the zip and converted in a small thread
+    pool; only a bounded window of them is held in memory at once.
+    """
+    html_to_text = _html_to_text()
+    with zipfile.ZipFile(io.BytesIO(file_content)) as zf:
+        spine = epub_spine(zf)
+        window = _EPUB_WORKERS * 2
+        with ThreadPoolExecutor(max_workers=_EPUB_WORKERS) as pool:
+            pending = []
+            for name in spine:
+                pending.append(pool.submit(html_to_text, zf.read(name)))
+                if len(pending) >= window:
+                    yield pending.pop(0).result()
+            for future in pending:
+                yield future.result()
+
+# Incremental extraction: files are split into sections (PDF pages, EPUB
+# spine documents, batches of DOCX blocks, TXT chunks ending on whitespace)
+# so a restarted worker can resume from the last finished section. Progress
+# is tracked by a cursor: the number of sections done, or for TXT the byte
+# offset reached.
+DOCX_SECTION_BLOCKS = 200
+TXT_SECTION_BYTES = 256 * 1024
+
+def count_sections(file_path: str, file_type: str) -> Optional[int]:
+    """
+    Final cursor value for a file, or None if only known after a full pass
+    """
+    if file_type == 'pdf':
+        import PyPDF2
+
+        with open(file_path, "rb") as f:
+            return len(PyPDF2.PdfReader(f).pages)
+    elif file_type == 'epub':
+        with zipfile.ZipFile(file_path) as zf:
+            return len(epub_spine(zf))
+    elif file_type == 'txt':
+        return os.path.getsize(file_path)
+    return None
+
+def iter_sections(file_path: str, file_type: str, start: int = 0) -> Iterator[Tuple[int, str]]:
+    """
+    Yield (cursor, text) for every section from cursor `start` onwards,
+    where the cursor is the position to resume from after that section
+    """
+    if file_type == 'pdf':
+        return _iter_pdf_sections(file_path, start)
+    elif file_type == 'docx':
+        return _iter_docx_sections(file_path, start)
+    elif file_type == 'txt':
+        return _iter_txt_sections(file_path, start)
+    elif file_type == 'epub':
+        return _iter_epub_sections(file_path, start)
+    else:
+        raise ValueError(f"Unsupported file type: {file_type}")
+
+def _iter_pdf_sections(file_path: str, start: int) -> Iterator[Tuple[int, str]]:
+    import PyPDF2
+
+    with open(file_path, "rb") as f:
+        reader = PyPDF2.PdfReader(f)
+        for index in range(start, len(reader.pages)):
+            yield index + 1, (reader.pages[index].extract_text() or "").strip()
+
+def _iter_docx_sections(file_path: str, start: int) -> Iterator[Tuple[int, str]]:
+    with zipfile.ZipFile(file_path) as zf:
+        with zf.open("word/document.xml") as document_xml:
+            blocks = []
+            index = 0
+            for text in _iter_document_xml(document_xml):
+                blocks.append(text)
+                if len(blocks) == DOCX_SECTION_BLOCKS:
+                    if index >= start:
+                        yield index + 1, "\n".join(blocks)
+                    blocks = []
+                    index += 1
+            if blocks and index >= start:
+                yield index + 1, "\n".join(blocks)
+
+def _txt_section_end(chunk: bytes) -> int:
+    """
+    Where to end a full-size chunk: after its last newline, else after its
+    last space or tab, else before its last (possibly partial) character
+    """
+    end = chunk.rfind(b"\n") + 1
+    if not end:
+        end = max(chunk.rfind(b" "), chunk.rfind(b"\t")) + 1
+    if not end:
+        end = len(chunk) - 1
+        while end > 0 and chunk[end] & 0xC0 == 0x80:
+            end -= 1
+    return end or len(chunk)
+
+def _iter_txt_sections(file_path: str, start: int) -> Iterator[Tuple[int, str]]:
+    # Sections never split a word or a UTF-8 character, so each decodes on
+    # its own and the byte offset after it is an exact resume point
+    with open(file_path, "rb") as f:
+        f.seek(start)
+        offset = start
+        rest = b""
+        while True:
+            chunk = rest + f.read(TXT_SECTION_BYTES - len(rest))
+            if not chunk:
+                break
+            end = _txt_section_end(chunk) if len(chunk) == TXT_SECTION_BYTES else len(chunk)
+            chunk, rest = chunk[:end], chunk[end:]
+            offset += end
+            yield offset, chunk.decode("utf-8", errors="ignore")
+
+def _iter_epub_sections(file_path: str, start: int) -> Iterator[Tuple[int, str]]:
+    html_to_text = _html_to_text()
+    with zipfile.ZipFile(file_path) as zf:
+        spine = epub_spine(zf)
+        for index in range(start, len(spine)):
+            yield index + 1, html_to_text(zf.read(spine[index])).strip()
@@ -0,0 +1,111 @@
+"""
+EPUB extraction time and peak memory as book size grows.
+
+    python benchmarks/bench_epub_extraction.py [--sizes 1 4 16]
+
+Compares the lxml engine, the html.parser fallback and, when EbookLib and
+BeautifulSoup are installed, the previous ebooklib + BeautifulSoup path.
+"""
+import argparse
+import io
+import sys
+import time
+import tracemalloc
+import zipfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from services import text_extraction  # noqa: E402
+
+CHAPTER_BYTES = 200 * 1024
+PARAGRAPH = "<p>The mitochondrion is the site of oxidative phosphorylation, producing ATP for the cell.</p>\n"
+
+def build_epub(size_mb: int) -> bytes:
+    chapters = max(1, size_mb * 1024 * 1024 // CHAPTER_BYTES)
+    body = PARAGRAPH * (CHAPTER_BYTES // len(PARAGRAPH))
+    manifest = "".join(
+        f'<item id="c{i}" href="c{i}.xhtml" media-type="application/xhtml+xml"/>' for i in range(chapters)
+    )
+    spine = "".join(f'<itemref idref="c{i}"/>' for i in range(chapters))
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("mimetype", "application/epub+zip")
+        zf.writestr(
+            "META-INF/container.xml",
+            '<?xml version="1.0"?><container version="1.0" xmlns="urn:oasis:names:tc:opendocument:xmlns:container">'
+            '<rootfiles><rootfile full-path="content.opf" media-type="application/oebps-package+xml"/></rootfiles></container>'
+        )
+        zf.writestr(
+            "content.opf",
+            '<?xml version="1.0"?><package xmlns="http://www.idpf.org/2007/opf" version="3.0" unique-identifier="id">'
+            '<metadata xmlns:dc="http://purl.org/dc/elements/1.1/"><dc:identifier id="id">bench</dc:identifier>'
+            '<dc:title>Bench</dc:title><dc:language>en</dc:language></metadata>'
+            f"<manifest>{manifest}</manifest><spine>{spine}</spine></package>"
+        )
+        for i in range(chapters):
+            zf.writestr(
+                f"c{i}.xhtml",
+                '<html xmlns="http://www.w3.org/1999/xhtml"><head><title>c</title><style>p{}</style></head>'
+                f"<body><script>x()</script>{body}</body></html>"
+            )
+    return buffer.getvalue()
+
+def legacy_extract(file_content: bytes) -> str:
+    import ebooklib
+    from ebooklib import epub
+    from bs4 import BeautifulSoup
+
+    book = epub.read_epub(io.BytesIO(file_content))
+    text = ""
+    for item in book.get_items():
+        if item.get_type() == ebooklib.ITEM_DOCUMENT:
+            text += BeautifulSoup(item.get_content(), 'html.parser').get_text() + "\n"
+    return text.strip()
+
+def engines():
+    found = {}
+    try:
+        import lxml.etree  # noqa: F401
+        found["lxml"] = text_extraction._html_to_text_lxml
+    except ImportError:
+        pass
+    found["html.parser"] = text_extraction._html_to_text_fallback
+    return found
+
+def measure(fn, data):
+    tracemalloc.start()
+    start = time.perf_counter()
+    text = fn(data)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, len(text)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 4, 16], help="uncompressed book sizes in MB")
+    args = parser.parse_args()
+
+    runners = {}
+    for name, engine in engines().items():
+        def run(data, engine=engine):
+            text_extraction._html_to_text = lambda: engine
+            return text_extraction.extract_from_epub(data)
+        runners[name] = run
+    try:
+        import ebooklib  # noqa: F401
+        import bs4  # noqa: F401
+        runners["ebooklib+bs4 (legacy)"] = legacy_extract
+    except ImportError:
+        print("EbookLib/BeautifulSoup not installed; skipping legacy baseline")
+
+    print(f"{'size':>6} {'engine':<24} {'seconds':>8} {'MB/s':>8} {'peak MB':>8}")
+    for size in args.sizes:
+        data = build_epub(size)
+        for name, run in runners.items():
+            elapsed, peak, _ = measure(run, data)
+            print(f"{size:>4}MB {name:<24} {elapsed:>8.3f} {size / elapsed:>8.1f} {peak / 2**20:>8.1f}")
+
+if __name__ == "__main__":
+    main()
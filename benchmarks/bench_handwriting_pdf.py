@@ -0,0 +1,51 @@
+"""
+Assignment PDF render time and output size per handwriting style.
+
+    python benchmarks/bench_handwriting_pdf.py [--questions 100] [--repeat 3]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from services import pdf_generator  # noqa: E402
+
+QUESTION = "Explain how the structure of the mitochondrion supports oxidative phosphorylation and ATP yield."
+ANSWER = (
+    "The inner membrane is folded into cristae, increasing the surface area available for the electron "
+    "transport chain and ATP synthase. Protons pumped into the intermembrane space create a gradient "
+    "that drives ATP synthesis as they flow back through ATP synthase.\n"
+) * 3
+
+def build_questions(count: int) -> list:
+    return [
+        {"question_type": "Long Answer", "question": f"{QUESTION} ({i})", "answer": ANSWER}
+        for i in range(count)
+    ]
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--questions", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    questions = build_questions(args.questions)
+    print(f"{'style':<10} {'font':<22} {'first s':>8} {'warm s':>8} {'KB':>8}")
+    for style in pdf_generator.HANDWRITING_STYLES:
+        start = time.perf_counter()
+        pdf = pdf_generator.generate_assignment_pdf(questions, "Student", "42", "Biology", style, "blue")
+        first = time.perf_counter() - start
+
+        # Later renders reuse the registered font and memoized widths/wraps
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            pdf_generator.generate_assignment_pdf(questions, "Student", "42", "Biology", style, "blue")
+        warm = (time.perf_counter() - start) / args.repeat
+
+        font = pdf_generator._register_handwriting_font(style)
+        print(f"{style:<10} {font:<22} {first:>8.3f} {warm:>8.3f} {len(pdf) / 1024:>8.1f}")
+
+if __name__ == "__main__":
+    main()
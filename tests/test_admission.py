@@ -0,0 +1,93 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+pytest.importorskip("pymongo")
+
+from services.admission import (  # noqa: E402
+    bucket_pipeline,
+    refill,
+    retry_after,
+    retry_after_header,
+)
+
+NOW = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+def evaluate(expr, doc):
+    """
+    Enough of the aggregation expression language to run bucket_pipeline
+    """
+    if isinstance(expr, str) and expr.startswith("$"):
+        return doc.get(expr[1:])
+    if not isinstance(expr, dict):
+        return expr
+    (op, args), = expr.items()
+    values = [evaluate(arg, doc) for arg in args]
+    if op == "$ifNull":
+        return values[0] if values[0] is not None else values[1]
+    if op == "$subtract":
+        diff = values[0] - values[1]
+        return diff.total_seconds() * 1000 if isinstance(diff, timedelta) else diff
+    if op == "$divide":
+        return values[0] / values[1]
+    if op == "$multiply":
+        return values[0] * values[1]
+    if op == "$add":
+        return values[0] + values[1]
+    if op == "$min":
+        return min(values)
+    if op == "$gte":
+        return values[0] >= values[1]
+    if op == "$cond":
+        return values[1] if values[0] else values[2]
+    raise NotImplementedError(op)
+
+def run_pipeline(doc, now, rate, capacity):
+    doc = dict(doc)
+    for stage in bucket_pipeline(now, rate, capacity):
+        updates = {field: evaluate(expr, doc) for field, expr in stage["$set"].items()}
+        doc.update(updates)
+    return doc
+
+def test_new_bucket_starts_full():
+    assert refill(None, 0, rate=1, capacity=5) == 5
+
+def test_refill_is_capped_at_capacity():
+    assert refill(1.0, 2, rate=0.5, capacity=5) == 2.0
+    assert refill(4.0, 3600, rate=0.5, capacity=5) == 5
+
+def test_retry_after_is_time_to_next_whole_token():
+    assert retry_after(0.25, rate=0.1) == pytest.approx(7.5)
+    assert retry_after(1.0, rate=0.1) == 0.0
+
+@pytest.mark.parametrize("seconds, header", [(0.0, "1"), (0.2, "1"), (1.0, "1"), (7.5, "8")])
+def test_retry_after_header_rounds_up_to_whole_seconds(seconds, header):
+    assert retry_after_header(seconds) == header
+
+def test_pipeline_takes_a_token_from_a_new_bucket():
+    bucket = run_pipeline({}, NOW, rate=0.1, capacity=4)
+    assert bucket["allowed"] is True
+    assert bucket["tokens"] == 3
+    assert bucket["updated_at"] == NOW
+
+def test_pipeline_matches_refill_and_rejects_when_empty():
+    rate, capacity = 0.1, 4
+    bucket = {"tokens": 0.2, "updated_at": NOW}
+    later = NOW + timedelta(seconds=3)
+
+    bucket = run_pipeline(bucket, later, rate, capacity)
+    assert bucket["allowed"] is False
+    assert bucket["tokens"] == pytest.approx(refill(0.2, 3, rate, capacity))
+    assert retry_after(bucket["tokens"], rate) == pytest.approx(5.0)
+
+    bucket = run_pipeline(bucket, later + timedelta(seconds=5), rate, capacity)
+    assert bucket["allowed"] is True
+    assert bucket["tokens"] == pytest.approx(0.0)
+
+def test_pipeline_drains_burst_then_rejects():
+    bucket = {}
+    outcomes = []
+    for _ in range(5):
+        bucket = run_pipeline(bucket, NOW, rate=0.1, capacity=4)
+        outcomes.append(bucket["allowed"])
+    assert outcomes == [True, True, True, True, False]
@@ -0,0 +1,59 @@
+from services.dedup_index import (
+    NUM_PERM,
+    NearDuplicateIndex,
+    decode_signature,
+    encode_signature,
+    minhash_signature,
+    shingles,
+)
+
+QUESTION = "What is the main function of the mitochondria in a eukaryotic cell?"
+
+def test_signature_is_stable():
+    signature = minhash_signature(QUESTION)
+    assert len(signature) == NUM_PERM
+    assert minhash_signature(QUESTION) == signature
+    # Persisted signatures must stay comparable across processes and releases
+    assert signature[:4] == (251453721, 122171468, 237113211, 5999414)
+
+def test_signature_ignores_punctuation_and_case():
+    assert minhash_signature(QUESTION) == minhash_signature("what is the MAIN function of the mitochondria, in a eukaryotic cell")
+
+def test_encode_decode_round_trip():
+    signature = minhash_signature(QUESTION)
+    data = encode_signature(signature)
+    assert len(data) == NUM_PERM * 4
+    assert decode_signature(data) == signature
+
+def test_document_round_trip():
+    index = NearDuplicateIndex()
+    index.add("q1", QUESTION)
+    index.add("q2", "Explain the process of photosynthesis in green plants.")
+    restored = NearDuplicateIndex.from_document(index.to_document())
+    assert restored.signatures == index.signatures
+    assert restored.is_duplicate("Explain the process of photosynthesis in green plants")
+
+def test_document_with_other_parameters_needs_rebuild():
+    assert NearDuplicateIndex.from_document({"num_perm": NUM_PERM * 2, "signatures": {}}) is None
+
+def test_near_duplicate_detected():
+    index = NearDuplicateIndex.from_questions([{"id": "q1", "question": QUESTION}])
+    assert index.find_duplicate(index.signature("What is the main function of mitochondria in a eukaryotic cell?")) == "q1"
+
+def test_distinct_questions_pass():
+    index = NearDuplicateIndex.from_questions([{"id": "q1", "question": QUESTION}])
+    assert not index.is_duplicate("Describe the stages of the water cycle.")
+    assert not index.is_duplicate("How do enzymes lower activation energy in reactions?")
+
+def test_threshold_controls_matching():
+    other = "What is the main function of the ribosome in a eukaryotic cell?"
+    a, b = shingles(QUESTION), shingles(other)
+    jaccard = len(a & b) / len(a | b)
+
+    strict = NearDuplicateIndex(threshold=0.95)
+    strict.add("q1", QUESTION)
+    assert not strict.is_duplicate(other)
+
+    loose = NearDuplicateIndex(threshold=jaccard - 0.25)
+    loose.add("q1", QUESTION)
+    assert loose.is_duplicate(other)
@@ -0,0 +1,82 @@
+import io
+import zipfile
+
+from services.text_extraction import extract_from_docx, iter_docx_text
+
+NAMESPACES = (
+    'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main" '
+    'xmlns:mc="http://schemas.openxmlformats.org/markup-compatibility/2006" '
+    'xmlns:wps="http://schemas.microsoft.com/office/word/2010/wordprocessingShape" '
+    'xmlns:v="urn:schemas-microsoft-com:vml"'
+)
+
+def para(*runs):
+    return "<w:p>" + "".join(f"<w:r>{r}</w:r>" for r in runs) + "</w:p>"
+
+def t(text):
+    return f'<w:t xml:space="preserve">{text}</w:t>'
+
+def table(*rows):
+    return "<w:tbl>" + "".join(
+        "<w:tr>" + "".join(f"<w:tc>{cell}</w:tc>" for cell in row) + "</w:tr>" for row in rows
+    ) + "</w:tbl>"
+
+def build_docx(body, media=b""):
+    document = f'<?xml version="1.0"?><w:document {NAMESPACES}><w:body>{body}<w:sectPr/></w:body></w:document>'
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("word/document.xml", document)
+        if media:
+            zf.writestr("word/media/image1.png", media)
+    return buffer.getvalue()
+
+def text_box(content):
+    return (
+        "<mc:AlternateContent>"
+        f"<mc:Choice Requires=\"wps\"><w:drawing><wps:txbx><w:txbxContent>{content}</w:txbxContent></wps:txbx></w:drawing></mc:Choice>"
+        f"<mc:Fallback><w:pict><v:textbox><w:txbxContent>{content}</w:txbxContent></v:textbox></w:pict></mc:Fallback>"
+        "</mc:AlternateContent>"
+    )
+
+def test_paragraphs_in_order():
+    body = para(t("First")) + para(t("Second"))
+    assert list(iter_docx_text(build_docx(body))) == ["First", "Second"]
+
+def test_tab_and_break():
+    body = para(t("Name"), "<w:tab/>", t("Value"), "<w:br/>", t("Next line"))
+    assert list(iter_docx_text(build_docx(body))) == ["Name\tValue\nNext line"]
+
+def test_text_box_with_fallback_is_read_once():
+    body = (
+        "<w:p><w:r>" + t("Before") + "</w:r><w:r>" + text_box(para(t("Box"))) + "</w:r></w:p>"
+        + para(t("After"))
+        + para(t("Second para"))
+    )
+    parts = list(iter_docx_text(build_docx(body)))
+    assert parts.count("Box") == 1
+    assert parts[-3:] == ["Before", "After", "Second para"]
+
+def test_table_inside_fallback_does_not_swallow_later_text():
+    body = (
+        "<w:p><w:r><mc:AlternateContent><mc:Choice Requires=\"wps\"/>"
+        "<mc:Fallback>" + table([para(t("Hidden"))]) + "</mc:Fallback>"
+        "</mc:AlternateContent></w:r></w:p>"
+        + para(t("Later para"))
+    )
+    assert list(iter_docx_text(build_docx(body))) == ["Later para"]
+
+def test_table_rows_and_cells():
+    body = table(
+        [para(t("A1")), para(t("B1"))],
+        [para(t("A2")), para(t("B2a")) + para(t("B2b"))],
+    ) + para(t("After table"))
+    assert list(iter_docx_text(build_docx(body))) == ["A1\tB1", "A2\tB2a B2b", "After table"]
+
+def test_nested_table_folds_into_enclosing_cell():
+    inner = table([para(t("x")), para(t("y"))])
+    body = table([para(t("Outer")), para(t("Cell")) + inner]) + para(t("Done"))
+    assert list(iter_docx_text(build_docx(body))) == ["Outer\tCell x\ty", "Done"]
+
+def test_embedded_media_is_ignored():
+    body = para(t("Only text"))
+    assert extract_from_docx(build_docx(body, media=b"\x89PNG" + b"\0" * 100000)) == "Only text"
@@ -0,0 +1,94 @@
+import io
+import zipfile
+
+import pytest
+
+from services import text_extraction
+from services.text_extraction import epub_spine, extract_from_epub, iter_epub_text
+
+CONTAINER = """<?xml version="1.0"?>
+<container version="1.0" xmlns="urn:oasis:names:tc:opendocument:xmlns:container">
+  <rootfiles><rootfile full-path="OEBPS/content.opf" media-type="application/oebps-package+xml"/></rootfiles>
+</container>"""
+
+OPF = """<?xml version="1.0"?>
+<package xmlns="http://www.idpf.org/2007/opf" version="3.0">
+  <manifest>
+    <item id="css" href="style.css" media-type="text/css"/>
+    <item id="c2" href="Text/chapter%202.xhtml" media-type="application/xhtml+xml"/>
+    <item id="c1" href="Text/chapter1.xhtml" media-type="application/xhtml+xml"/>
+  </manifest>
+  <spine><itemref idref="c1"/><itemref idref="c2"/></spine>
+</package>"""
+
+CHAPTER_1 = """<?xml version="1.0" encoding="utf-8"?>
+<html xmlns="http://www.w3.org/1999/xhtml">
+<head><title>Title text</title><style>p { color: red; }</style></head>
+<body><h1>Chapter One</h1><p>Cells &amp; tissues</p><script>track();</script><p>Café</p></body>
+</html>"""
+
+CHAPTER_2 = "<html><body><p>Chapter Two</p><noscript>Enable JS</noscript></body></html>"
+
+def build_epub(opf=OPF):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as zf:
+        zf.writestr("mimetype", "application/epub+zip")
+        zf.writestr("META-INF/container.xml", CONTAINER)
+        zf.writestr("OEBPS/content.opf", opf)
+        zf.writestr("OEBPS/style.css", "p {}")
+        zf.writestr("OEBPS/Text/chapter1.xhtml", CHAPTER_1)
+        zf.writestr("OEBPS/Text/chapter 2.xhtml", CHAPTER_2)
+    return buffer.getvalue()
+
+@pytest.fixture(params=["lxml", "fallback"])
+def html_engine(request, monkeypatch):
+    if request.param == "lxml":
+        pytest.importorskip("lxml")
+        engine = text_extraction._html_to_text_lxml
+    else:
+        engine = text_extraction._html_to_text_fallback
+    monkeypatch.setattr(text_extraction, "_html_to_text", lambda: engine)
+    return request.param
+
+def test_spine_order_and_percent_encoded_hrefs():
+    with zipfile.ZipFile(io.BytesIO(build_epub())) as zf:
+        assert epub_spine(zf) == ["OEBPS/Text/chapter1.xhtml", "OEBPS/Text/chapter 2.xhtml"]
+
+def test_spine_falls_back_to_manifest_documents():
+    opf = OPF.replace('<spine><itemref idref="c1"/><itemref idref="c2"/></spine>', "<spine/>")
+    with zipfile.ZipFile(io.BytesIO(build_epub(opf))) as zf:
+        assert sorted(epub_spine(zf)) == ["OEBPS/Text/chapter 2.xhtml", "OEBPS/Text/chapter1.xhtml"]
+
+def test_extracts_text_in_reading_order(html_engine):
+    text = extract_from_epub(build_epub())
+    assert text.index("Chapter One") < text.index("Chapter Two")
+    assert "Cells & tissues" in text
+    assert "Café" in text
+
+def test_strips_head_scripts_and_styles(html_engine):
+    text = extract_from_epub(build_epub())
+    for hidden in ("Title text", "color: red", "track()", "Enable JS"):
+        assert hidden not in text
+
+def test_yields_one_item_per_spine_document(html_engine):
+    parts = list(iter_epub_text(build_epub()))
+    assert len(parts) == 2
+    assert "Chapter Two" in parts[1]
+
+def test_missing_container_is_rejected():
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as zf:
+        zf.writestr("mimetype", "application/epub+zip")
+    with pytest.raises(KeyError):
+        extract_from_epub(buffer.getvalue())
+
+@pytest.mark.parametrize("chapter", [
+    '<html xmlns="http://www.w3.org/1999/xhtml"><body><p>Café — naïve</p></body></html>'.encode("utf-8"),
+    b"\xef\xbb\xbf" + '<html><body><p>Café — naïve</p></body></html>'.encode("utf-8"),
+    '<?xml version="1.0" encoding="utf-16"?><html><body><p>Café — naïve</p></body></html>'.encode("utf-16"),
+    '<?xml version="1.0" encoding="iso-8859-1"?><html><body><p>Café naïve</p></body></html>'.encode("latin-1"),
+])
+def test_non_ascii_chapters_decode_correctly(html_engine, chapter):
+    text = text_extraction._html_to_text()(chapter)
+    assert "Café" in text
+    assert "naïve" in text
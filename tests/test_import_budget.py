@@ -0,0 +1,46 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+
+# Libraries that must only load on first use of their feature
+LAZY_MODULES = ["PyPDF2", "docx", "ebooklib", "bs4", "reportlab", "lxml", "emergentintegrations"]
+# Cumulative import time allowed for `import server`, in microseconds
+IMPORT_BUDGET_US = int(os.environ.get("IMPORT_BUDGET_US", "1500000"))
+
+pytest.importorskip("fastapi")
+pytest.importorskip("motor")
+
+def import_server():
+    env = dict(os.environ, MONGO_URL="mongodb://localhost:27017", DB_NAME="import_budget_test")
+    check = f"import sys, server; print(sorted(m for m in {LAZY_MODULES!r} if m in sys.modules))"
+    return subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", check],
+        cwd=BACKEND_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+
+def cumulative_us(importtime_output: str, module: str) -> int:
+    # Lines look like: "import time:   self [us] | cumulative | imported package"
+    for line in importtime_output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = [f.strip() for f in line[len("import time:"):].split("|")]
+        if len(fields) == 3 and fields[2] == module:
+            return int(fields[1])
+    raise AssertionError(f"{module} not found in importtime output")
+
+def test_server_import_does_not_load_heavy_dependencies():
+    result = import_server()
+    assert result.stdout.strip() == "[]"
+
+def test_server_import_within_budget():
+    result = import_server()
+    assert cumulative_us(result.stderr, "server") <= IMPORT_BUDGET_US
@@ -0,0 +1,37 @@
+import pytest
+
+pytest.importorskip("reportlab")
+
+from services import pdf_generator  # noqa: E402
+
+QUESTIONS = [
+    {"question_type": "MCQ", "question": "What is ATP?", "answer": "The energy currency of the cell."},
+]
+
+@pytest.mark.parametrize("style", sorted(pdf_generator.HANDWRITING_STYLES))
+def test_styles_use_bundled_handwriting_fonts(style):
+    profile = pdf_generator.HANDWRITING_STYLES[style]
+    assert (pdf_generator.FONTS_DIR / profile["ttf"]).exists()
+    assert pdf_generator._register_handwriting_font(style) == profile["font"]
+
+@pytest.mark.parametrize("style", sorted(pdf_generator.HANDWRITING_STYLES))
+def test_renders_embedded_handwriting_font(style):
+    pdf = pdf_generator.generate_assignment_pdf(QUESTIONS, "Ann", "12", "Biology", style, "black")
+    assert pdf.startswith(b"%PDF")
+    assert b"AmaticSC" in pdf
+
+def test_render_is_deterministic_for_same_student():
+    first = pdf_generator.generate_assignment_pdf(QUESTIONS, "Ann", "12", "Biology", "cursive", "blue")
+    second = pdf_generator.generate_assignment_pdf(QUESTIONS, "Ann", "12", "Biology", "cursive", "blue")
+    # Creation timestamps and document IDs differ; the page content must not
+    strip = lambda pdf: pdf.split(b"/CreationDate")[0]
+    assert strip(first) == strip(second)
+
+def test_wrap_respects_width():
+    font = pdf_generator._register_handwriting_font("neat")
+    url = "https://example.com/" + "averyverylongpathsegment" * 8
+    text = "word " * 200 + url + " tail"
+    lines = pdf_generator._wrap_lines(text, font, 20.0, 300.0)
+    assert len(lines) > 1
+    assert all(pdf_generator._word_width(line, font, 20.0) <= 300.0 for line in lines)
+    assert "".join(lines).replace(" ", "") == text.replace(" ", "")
@@ -0,0 +1,84 @@
+import asyncio
+import json
+
+from services import question_generator
+from services.question_generator import parse_questions_response
+
+QUESTIONS = [
+    {"type": "MCQ", "question": "What is ATP?", "answer": "Energy currency",
+     "options": {"A": "Energy currency", "B": "A protein {folded}"}},
+    {"type": "Short Answer", "question": "Define osmosis.", "answer": "Diffusion of water"},
+]
+
+def questions_text(parsed):
+    return [q['question'] for q in parsed]
+
+def test_plain_array():
+    assert parse_questions_response(json.dumps(QUESTIONS)) == QUESTIONS
+
+def test_fenced_array():
+    response = "```json\n" + json.dumps(QUESTIONS, indent=2) + "\n```"
+    assert parse_questions_response(response) == QUESTIONS
+
+def test_unbalanced_fence():
+    response = "```json\n" + json.dumps(QUESTIONS)
+    assert parse_questions_response(response) == QUESTIONS
+
+def test_prose_wrapped():
+    response = "Here are your questions:\n" + json.dumps(QUESTIONS) + "\nLet me know if you need more {or fewer}."
+    assert parse_questions_response(response) == QUESTIONS
+
+def test_truncated_keeps_complete_objects():
+    full = json.dumps(QUESTIONS + [{"type": "MCQ", "question": "Cut off", "answer": "never"}])
+    response = full[:full.rindex('"answer"') + 5]
+    assert questions_text(parse_questions_response(response)) == ["What is ATP?", "Define osmosis."]
+
+def test_truncated_inside_nested_options():
+    first = json.dumps(QUESTIONS[1])
+    response = "[" + first + ', {"type": "MCQ", "question": "Which?", "options": {"A": "x", "B"'
+    assert questions_text(parse_questions_response(response)) == ["Define osmosis."]
+
+def test_nested_options_preserved():
+    parsed = parse_questions_response(json.dumps(QUESTIONS))
+    assert parsed[0]["options"] == QUESTIONS[0]["options"]
+
+def test_wrapper_object():
+    assert parse_questions_response(json.dumps({"questions": QUESTIONS})) == QUESTIONS
+
+def test_fenced_wrapper_object():
+    response = "```\n" + json.dumps({"questions": QUESTIONS}) + "\n```"
+    assert parse_questions_response(response) == QUESTIONS
+
+def test_truncated_wrapper_object():
+    response = json.dumps({"questions": QUESTIONS})[:-5]
+    assert questions_text(parse_questions_response(response)) == ["What is ATP?"]
+
+def test_single_question_object():
+    assert parse_questions_response(json.dumps(QUESTIONS[1])) == [QUESTIONS[1]]
+
+def test_no_json():
+    assert parse_questions_response("Sorry, I can't help with that.") == []
+
+def test_malformed_questions_do_not_count(monkeypatch):
+    responses = [
+        [
+            {"type": "MCQ", "question": None, "answer": "x"},
+            {"type": "MCQ", "question": "What is ATP?", "answer": ["a", "b"]},
+            {"type": "MCQ", "question": "Define osmosis.", "answer": {"text": "x"}},
+            {"type": ["MCQ"], "question": "Define diffusion.", "answer": "Spreading out"},
+            {"type": "MCQ", "question": "  ", "answer": "Blank"},
+            QUESTIONS[1],
+        ],
+        [QUESTIONS[0]],
+    ]
+    requested = []
+
+    async def fake_request(text, types, difficulty, num_questions, existing):
+        requested.append(num_questions)
+        return responses.pop(0)
+
+    monkeypatch.setattr(question_generator, "_request_questions", fake_request)
+    result = asyncio.run(question_generator.generate_questions_with_answers("text", ["MCQ"], "easy", 2))
+
+    assert questions_text(result) == ["Define osmosis.", "What is ATP?"]
+    assert requested == [2, 1]
@@ -0,0 +1,44 @@
+import pytest
+
+from services import text_extraction
+from services.text_extraction import count_sections, iter_sections
+
+@pytest.fixture(autouse=True)
+def small_sections(monkeypatch):
+    monkeypatch.setattr(text_extraction, "TXT_SECTION_BYTES", 16)
+
+def write_txt(tmp_path, text):
+    path = tmp_path / "book.txt"
+    path.write_bytes(text.encode("utf-8"))
+    return str(path)
+
+def test_sections_rebuild_the_text(tmp_path):
+    text = "The mitochondria is the powerhouse of the cell.\nRibosomes build proteins.\n"
+    sections = list(iter_sections(write_txt(tmp_path, text), "txt"))
+
+    assert "".join(section for _, section in sections) == text
+    assert len(sections) > 1
+
+def test_sections_end_on_whitespace(tmp_path):
+    text = "alpha beta gamma delta epsilon zeta eta theta iota kappa"
+    sections = list(iter_sections(write_txt(tmp_path, text), "txt"))
+
+    assert sum(len(section.split()) for _, section in sections) == len(text.split())
+    for _, section in sections[:-1]:
+        assert section[-1].isspace()
+
+def test_long_word_is_split_on_a_character_boundary(tmp_path):
+    text = "é" * 20
+    sections = list(iter_sections(write_txt(tmp_path, text), "txt"))
+
+    assert "".join(section for _, section in sections) == text
+
+def test_cursor_is_a_byte_offset_to_resume_from(tmp_path):
+    text = "naïve café résumé über straße\nsecond line of words here\n"
+    path = write_txt(tmp_path, text)
+    sections = list(iter_sections(path, "txt"))
+
+    assert sections[-1][0] == count_sections(path, "txt") == len(text.encode("utf-8"))
+    for i, (cursor, _) in enumerate(sections):
+        resumed = list(iter_sections(path, "txt", start=cursor))
+        assert resumed == sections[i + 1:]